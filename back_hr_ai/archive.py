@@ -0,0 +1,129 @@
+"""
+오래된 대화방 메시지 아카이빙.
+
+리포트가 이미 생성되었고 ARCHIVE_AFTER_DAYS 보다 오래된 대화방의 메시지를
+Messages 테이블에서 MessageArchives 테이블로 (zlib 압축 JSON) 옮긴다.
+Messages 테이블과 인덱스를 작게 유지하기 위한 용도이며,
+조회 시에는 get_room_messages()가 아카이브를 투명하게 합쳐서 돌려준다.
+
+Usage:
+    python archive.py              # ARCHIVE_AFTER_DAYS (기본 90일) 기준
+    python archive.py --days 30
+"""
+import os
+import json
+import zlib
+import datetime
+import argparse
+
+from sqlalchemy.orm import Session
+
+from models import Message, Report, ChatRoom, MessageArchive
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "100"))
+
+
+def _pack_messages(messages: list[dict]) -> bytes:
+    raw = json.dumps(messages, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, 9)
+
+
+def _unpack_messages(payload: bytes) -> list[dict]:
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+def _message_to_dict(msg: Message) -> dict:
+    return {
+        "message_id": msg.message_id,
+        "room_id": msg.room_id,
+        "sender": msg.sender,
+        "content": msg.content,
+        "created_at": msg.created_at.isoformat() if msg.created_at else None,
+    }
+
+
+def _dict_to_message(data: dict) -> Message:
+    # 세션에 추가하지 않는 transient 객체 - 응답 직렬화 용도로만 사용
+    created_at = data.get("created_at")
+    return Message(
+        message_id=data["message_id"],
+        room_id=data["room_id"],
+        sender=data["sender"],
+        content=data["content"],
+        created_at=datetime.datetime.fromisoformat(created_at) if created_at else None,
+    )
+
+
+def archive_room(db: Session, room_id: int) -> int:
+    """Move all hot messages of one room into its archive row. Returns the number of moved messages."""
+    hot_messages = db.query(Message).filter(Message.room_id == room_id).order_by(Message.created_at, Message.message_id).all()
+    if not hot_messages:
+        return 0
+
+    archive = db.query(MessageArchive).filter(MessageArchive.room_id == room_id).first()
+    archived = _unpack_messages(archive.payload) if archive else []
+    archived.extend(_message_to_dict(m) for m in hot_messages)
+
+    if archive:
+        archive.payload = _pack_messages(archived)
+        archive.message_count = len(archived)
+        archive.archived_at = datetime.datetime.now()
+    else:
+        db.add(MessageArchive(room_id=room_id, payload=_pack_messages(archived), message_count=len(archived)))
+
+    db.query(Message).filter(
+        Message.room_id == room_id,
+        Message.message_id.in_([m.message_id for m in hot_messages])
+    ).delete(synchronize_session=False)
+    return len(hot_messages)
+
+
+def archive_old_rooms(db: Session, older_than_days: int | None = None, batch_size: int = ARCHIVE_BATCH_SIZE) -> dict:
+    """Archive messages of every room older than `older_than_days` that already has a report."""
+    days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=days)
+
+    candidate_ids = [
+        room_id for (room_id,) in db.query(ChatRoom.room_id)
+        .filter(ChatRoom.created_at < cutoff)
+        .filter(ChatRoom.room_id.in_(db.query(Report.room_id)))
+        .filter(ChatRoom.room_id.in_(db.query(Message.room_id)))
+        .order_by(ChatRoom.room_id)
+        .all()
+    ]
+
+    rooms_archived, messages_archived = 0, 0
+    for start in range(0, len(candidate_ids), batch_size):
+        for room_id in candidate_ids[start:start + batch_size]:
+            moved = archive_room(db, room_id)
+            if moved:
+                rooms_archived += 1
+                messages_archived += moved
+        db.commit() # 배치 단위로 커밋해서 트랜잭션/락을 짧게 유지
+    return {"rooms_archived": rooms_archived, "messages_archived": messages_archived, "cutoff": cutoff.isoformat()}
+
+
+def get_room_messages(db: Session, room_id: int) -> list[Message]:
+    """Return all messages of a room in chronological order, reading the archive transparently."""
+    hot_messages = db.query(Message).filter(Message.room_id == room_id).order_by(Message.created_at, Message.message_id).all()
+    archive = db.query(MessageArchive).filter(MessageArchive.room_id == room_id).first()
+    if not archive:
+        return hot_messages
+    return [_dict_to_message(m) for m in _unpack_messages(archive.payload)] + hot_messages
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Archive messages of old chat rooms that already have a report.")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="archive rooms older than this many days")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = archive_old_rooms(db, older_than_days=args.days, batch_size=args.batch_size)
+        print(f"Archived {result['messages_archived']} messages from {result['rooms_archived']} rooms (cutoff: {result['cutoff']}).")
+    finally:
+        db.close()
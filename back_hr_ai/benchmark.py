@@ -0,0 +1,93 @@
+"""
+핫 엔드포인트 벤치마크.
+
+데이터 규모별로 DB를 초기화하고 generate_data.generate() 로 데이터를 채운 뒤
+get_chat_rooms / get_team_reports / get_report / get_chat_room_details 를 직접 호출해서
+(응답 직렬화 포함) 지연 시간을 측정한다.
+
+DANGER: DATABASE_URL 의 모든 테이블을 drop 한다. 개발/벤치마크 DB 에서만 실행할 것.
+
+Usage:
+    python benchmark.py --reset --sizes small,medium
+    python benchmark.py --reset --sizes large --iterations 50
+"""
+import random
+import argparse
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from database import Base, engine, SessionLocal
+from models import User, ChatRoom, Report
+from generate_data import generate
+import main
+
+# (teams, users_per_team, rooms_per_user, messages_per_room)
+SIZES = {
+    "small": (2, 10, 10, 10),
+    "medium": (10, 20, 50, 12),
+    "large": (20, 50, 200, 16),
+    "xlarge": (50, 100, 365, 20),
+}
+
+
+def _time_call(fn, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        jsonable_encoder(fn())
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max": samples[-1],
+    }
+
+
+def run_endpoints(iterations: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    db = SessionLocal()
+    try:
+        member = db.query(User).filter(User.role == "팀원").order_by(User.user_id).first()
+        leader = db.query(User).filter(User.role == "팀장").order_by(User.user_id).first()
+        room_ids = [r for (r,) in db.query(ChatRoom.room_id).filter(ChatRoom.user_id == member.user_id).all()]
+        report_ids = [r for (r,) in db.query(Report.report_id).join(ChatRoom).filter(ChatRoom.user_id == member.user_id).all()]
+
+        results = {}
+        results["get_chat_rooms"] = _time_call(lambda: main.get_chat_rooms(db=db, current_user=member), iterations)
+        results["get_team_reports"] = _time_call(lambda: main.get_team_reports(db=db, current_user=leader), iterations)
+        results["get_report"] = _time_call(lambda: main.get_report(rng.choice(report_ids), db=db), iterations)
+        results["get_chat_room_details"] = _time_call(lambda: main.get_chat_room_details(rng.choice(room_ids), db=db), iterations)
+        return results
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark hot HR-AI endpoints at several data sizes.")
+    parser.add_argument("--sizes", default="small,medium", help=f"comma separated presets: {', '.join(SIZES)}")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--reset", action="store_true", help="required: drop and recreate all tables before each size")
+    args = parser.parse_args()
+
+    if not args.reset:
+        parser.error("benchmark.py drops all tables; pass --reset to confirm.")
+
+    for size in args.sizes.split(","):
+        teams, users_per_team, rooms_per_user, messages_per_room = SIZES[size]
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+
+        started = time.perf_counter()
+        counts = generate(engine, teams, users_per_team, rooms_per_user, messages_per_room, seed=args.seed, chunk_size=args.chunk_size)
+        load_seconds = time.perf_counter() - started
+
+        print(f"\n=== {size}: {counts['users']} users, {counts['rooms']} rooms, {counts['messages']} messages, "
+              f"{counts['reports']} reports (loaded in {load_seconds:.1f}s) ===")
+        for endpoint, stats in run_endpoints(args.iterations, args.seed).items():
+            print(f"{endpoint:<24} mean {stats['mean']:8.2f}ms  p50 {stats['p50']:8.2f}ms  p95 {stats['p95']:8.2f}ms  max {stats['max']:8.2f}ms")
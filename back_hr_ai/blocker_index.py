@@ -0,0 +1,283 @@
+"""
+팀 단위 반복 블로커 탐지 (오프라인, LLM 없음).
+
+리포트의 "이슈 및 블로커" 섹션 bullet 을 (섹션이 없으면 ReportContext.blockers 의 각 줄을) 블로커 문장으로 뽑아
+hashed character n-gram 벡터(scipy.sparse)로 만들고, 팀별 클러스터 중심과의 코사인 유사도로
+가장 가까운 클러스터에 넣거나(임계값 이상) 새 클러스터를 만든다 (incremental leader clustering).
+리포트는 ReportContext 를 바탕으로 작성되므로 두 출처를 모두 색인하면 같은 블로커가 두 번 잡힌다.
+리포트가 생성될 때마다 해당 대화방만 색인하며, 클러스터별 대화방 수/팀원 수/날짜 수를 미리 집계해 두므로
+"반복되는 블로커" 조회는 BlockerClusters 만 읽는다.
+
+Usage:
+    python blocker_index.py             # 아직 색인되지 않은, 리포트가 있는 모든 대화방 색인 (backfill)
+"""
+import io
+import os
+import re
+import zlib
+import datetime
+import threading
+import argparse
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import User, ChatRoom, Report, ReportContext, BlockerCluster, BlockerFragment
+
+DEFAULT_VALUE = "내용 없음"
+SECTION_TITLE = "이슈 및 블로커"
+
+N_FEATURES = 2 ** 18
+NGRAM_SIZES = (2, 3)
+CENTROID_MAX_NNZ = 512 # 중심 벡터가 계속 커지지 않도록 상위 가중치만 유지
+SIMILARITY_THRESHOLD = float(os.getenv("BLOCKER_SIMILARITY_THRESHOLD", "0.45"))
+
+_NONE_RE = re.compile(r"^(특별한|별다른|특이)?\s*(이슈|블로커|문제|사항)?\s*(는|은|이|가)?\s*(없음|없습니다|없었습니다|없었음|없다|없어|없었어)\.?$")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•·]|\d+[.)])\s*")
+_HEADING_RE = re.compile(r"^\s*(#{1,6}\s|\*\*.+\*\*\s*:?\s*$)")
+
+# 같은 팀을 동시에 색인하면 중복 클러스터가 생길 수 있으므로 프로세스 내에서 직렬화
+_index_lock = threading.Lock()
+
+
+# --- Fragment extraction ---
+def _clean(text: str) -> str:
+    text = _BULLET_RE.sub("", text).replace("**", "").strip()
+    return re.sub(r"\s+", " ", text)
+
+
+def _is_meaningful(text: str) -> bool:
+    return len(text) >= 2 and text != DEFAULT_VALUE and not _NONE_RE.match(text)
+
+
+def extract_context_blockers(blockers: str | None) -> list[str]:
+    if not blockers or blockers == DEFAULT_VALUE:
+        return []
+    return [t for t in (_clean(line) for line in blockers.splitlines()) if _is_meaningful(t)]
+
+
+def extract_report_blockers(summary_content: str | None) -> list[str]:
+    """Bullet lines under the "이슈 및 블로커" heading of a markdown report."""
+    fragments, in_section = [], False
+    for line in (summary_content or "").splitlines():
+        if _HEADING_RE.match(line):
+            in_section = SECTION_TITLE in line
+            continue
+        if in_section:
+            text = _clean(line)
+            if _is_meaningful(text):
+                fragments.append(text)
+    return fragments
+
+
+# --- Vectorization ---
+def _normalize(text: str) -> str:
+    return re.sub(r"[^\w\s]", " ", text.lower()).strip()
+
+
+def vectorize(texts: list[str]) -> sp.csr_matrix:
+    """L2-normalized hashed character n-gram vectors (sublinear tf), one row per text."""
+    rows, cols, vals = [], [], []
+    for i, text in enumerate(texts):
+        padded = f" {_normalize(text)} "
+        grams = [padded[j:j + n] for n in NGRAM_SIZES for j in range(len(padded) - n + 1)]
+        if not grams:
+            continue
+        # crc32: 파이썬 hash() 는 프로세스마다 달라져서 저장된 중심 벡터와 호환되지 않음
+        hashed = np.fromiter((zlib.crc32(g.encode("utf-8")) % N_FEATURES for g in grams), dtype=np.int64, count=len(grams))
+        idx, counts = np.unique(hashed, return_counts=True)
+        weights = 1.0 + np.log(counts)
+        weights /= np.linalg.norm(weights)
+        rows.append(np.full(len(idx), i))
+        cols.append(idx)
+        vals.append(weights)
+    if not rows:
+        return sp.csr_matrix((len(texts), N_FEATURES), dtype=np.float32)
+    return sp.csr_matrix(
+        (np.concatenate(vals).astype(np.float32), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(len(texts), N_FEATURES)
+    )
+
+
+def _pack_vector(vec: sp.csr_matrix) -> bytes:
+    vec = vec.tocsr()
+    if vec.nnz > CENTROID_MAX_NNZ:
+        keep = np.argsort(vec.data)[-CENTROID_MAX_NNZ:]
+        vec = sp.csr_matrix((vec.data[keep], (np.zeros(len(keep), dtype=np.int64), vec.indices[keep])), shape=(1, N_FEATURES))
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, indices=vec.indices.astype(np.int32), data=vec.data.astype(np.float32))
+    return buffer.getvalue()
+
+
+def _unpack_vector(payload: bytes) -> sp.csr_matrix:
+    arrays = np.load(io.BytesIO(payload))
+    indices, data = arrays["indices"], arrays["data"]
+    return sp.csr_matrix((data, (np.zeros(len(indices), dtype=np.int64), indices)), shape=(1, N_FEATURES))
+
+
+def _row_normalize(matrix: sp.csr_matrix) -> sp.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.diags(1.0 / norms) @ matrix
+
+
+# --- Incremental clustering ---
+def _refresh_cluster_stats(db: Session, cluster: BlockerCluster):
+    # fragment_count 는 대화방 단위: 한 대화방에서 비슷한 문장이 여러 번 나와도 한 번으로 셈
+    fragment_count, member_count, first_seen, last_seen = db.query(
+        func.count(func.distinct(BlockerFragment.room_id)),
+        func.count(func.distinct(BlockerFragment.user_id)),
+        func.min(BlockerFragment.created_at),
+        func.max(BlockerFragment.created_at),
+    ).filter(BlockerFragment.cluster_id == cluster.cluster_id).one()
+    day_count = db.query(func.count(func.distinct(func.date(BlockerFragment.created_at)))).filter(
+        BlockerFragment.cluster_id == cluster.cluster_id
+    ).scalar()
+    cluster.fragment_count = fragment_count
+    cluster.member_count = member_count
+    cluster.day_count = day_count or 0
+    cluster.first_seen = first_seen
+    cluster.last_seen = last_seen
+
+
+def index_room(db: Session, room_id: int) -> int:
+    """Extract, vectorize and cluster the blockers of one reported room. Returns the number of new fragments."""
+    with _index_lock:
+        if db.query(BlockerFragment.fragment_id).filter(BlockerFragment.room_id == room_id).first():
+            return 0 # 이미 색인됨
+
+        row = (
+            db.query(ChatRoom.room_id, ChatRoom.user_id, ChatRoom.created_at, User.team_id, ReportContext.blockers)
+            .join(User, User.user_id == ChatRoom.user_id)
+            .outerjoin(ReportContext, ReportContext.room_id == ChatRoom.room_id)
+            .filter(ChatRoom.room_id == room_id)
+            .first()
+        )
+        report = db.query(Report).filter(Report.room_id == room_id).first()
+        if row is None or report is None:
+            return 0
+
+        # 대화방당 한 출처만 색인: 리포트 섹션, 없으면 ReportContext.blockers
+        fragments = [("report", t) for t in extract_report_blockers(report.summary_content)]
+        if not fragments:
+            fragments = [("context", t) for t in extract_context_blockers(row.blockers)]
+        if not fragments:
+            return 0
+
+        vectors = vectorize([text for _, text in fragments])
+        clusters = db.query(BlockerCluster).filter(BlockerCluster.team_id == row.team_id).order_by(BlockerCluster.cluster_id).all()
+        centroids = [_unpack_vector(c.centroid) for c in clusters]
+
+        touched = {}
+        for i, (source, text) in enumerate(fragments):
+            vec = vectors[i]
+            best, best_sim = None, 0.0
+            if centroids:
+                sims = (_row_normalize(sp.vstack(centroids)) @ vec.T).toarray().ravel()
+                best = int(np.argmax(sims))
+                best_sim = float(sims[best])
+
+            if best is not None and best_sim >= SIMILARITY_THRESHOLD:
+                cluster = clusters[best]
+                centroids[best] = centroids[best] + vec
+            else:
+                cluster = BlockerCluster(team_id=row.team_id, label=text, centroid=b"")
+                db.add(cluster)
+                db.flush()
+                clusters.append(cluster)
+                centroids.append(vec)
+                best = len(clusters) - 1
+
+            db.add(BlockerFragment(
+                cluster_id=cluster.cluster_id, team_id=row.team_id, user_id=row.user_id, room_id=room_id,
+                source=source, content=text, created_at=report.created_at or row.created_at
+            ))
+            touched[cluster.cluster_id] = best
+
+        db.flush()
+        for cluster_id, position in touched.items():
+            cluster = clusters[position]
+            cluster.centroid = _pack_vector(centroids[position])
+            _refresh_cluster_stats(db, cluster)
+        db.commit()
+        return len(fragments)
+
+
+def index_room_task(room_id: int):
+    """BackgroundTasks entry point - uses its own session since the request session is closed."""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        index_room(db, room_id)
+    except Exception as e:
+        db.rollback()
+        print(f"[ERROR] Failed to index blockers for room {room_id}: {e}")
+    finally:
+        db.close()
+
+
+def remove_room(db: Session, room_id: int):
+    """Drop a room's fragments and refresh (or delete) the clusters they belonged to. Caller commits."""
+    cluster_ids = {c for (c,) in db.query(BlockerFragment.cluster_id).filter(BlockerFragment.room_id == room_id).distinct()}
+    if not cluster_ids:
+        return
+    db.query(BlockerFragment).filter(BlockerFragment.room_id == room_id).delete(synchronize_session=False)
+    db.flush()
+    for cluster in db.query(BlockerCluster).filter(BlockerCluster.cluster_id.in_(cluster_ids)).all():
+        _refresh_cluster_stats(db, cluster)
+        if cluster.fragment_count == 0:
+            db.delete(cluster)
+
+
+def top_recurring_blockers(db: Session, team_id: int, limit: int = 10, days: int | None = None, samples: int = 3) -> list[dict]:
+    query = db.query(BlockerCluster).filter(BlockerCluster.team_id == team_id)
+    if days:
+        query = query.filter(BlockerCluster.last_seen >= datetime.datetime.now() - datetime.timedelta(days=days))
+    clusters = query.order_by(
+        BlockerCluster.member_count.desc(), BlockerCluster.day_count.desc(), BlockerCluster.fragment_count.desc()
+    ).limit(limit).all()
+
+    result = []
+    for cluster in clusters:
+        recent = (
+            db.query(BlockerFragment.content, BlockerFragment.user_id, BlockerFragment.created_at)
+            .filter(BlockerFragment.cluster_id == cluster.cluster_id)
+            .order_by(BlockerFragment.created_at.desc())
+            .limit(samples)
+            .all()
+        )
+        result.append({
+            "cluster_id": cluster.cluster_id,
+            "label": cluster.label,
+            "fragment_count": cluster.fragment_count,
+            "member_count": cluster.member_count,
+            "day_count": cluster.day_count,
+            "first_seen": cluster.first_seen,
+            "last_seen": cluster.last_seen,
+            "examples": [{"content": r.content, "user_id": r.user_id, "created_at": r.created_at} for r in recent],
+        })
+    return result
+
+
+if __name__ == "__main__":
+    from database import Base, engine, SessionLocal
+
+    parser = argparse.ArgumentParser(description="Index blockers of reported rooms that are not indexed yet.")
+    parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        pending = [
+            room_id for (room_id,) in db.query(Report.room_id)
+            .filter(~Report.room_id.in_(db.query(BlockerFragment.room_id)))
+            .order_by(Report.created_at)
+            .all()
+        ]
+        total = sum(index_room(db, room_id) for room_id in pending)
+        print(f"Indexed {total} blocker fragments from {len(pending)} rooms.")
+    finally:
+        db.close()
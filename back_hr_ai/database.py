@@ -1,27 +1,123 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import QueuePool
 import os
+import time
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# 읽기 전용 복제본. 설정하지 않으면 읽기도 primary 로 간다.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
 
 if not DATABASE_URL:
     raise Exception("DATABASE_URL environment variable not set.")
 
-# MySQL 데이터베이스 연결을 위한 설정
-# create_engine 함수의 pool_pre_ping=True 옵션은 데이터베이스 연결이 유효한지 확인
-# pool_recycle은 지정된 시간이 경과하면 연결 풀의 연결을 재생
-engine = create_engine(
-    DATABASE_URL, pool_pre_ping=True, pool_recycle=3600
+# 커넥션 풀 설정 (replica 는 따로 지정하지 않으면 primary 설정을 따름)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_REPLICA_MAX_OVERFLOW = int(os.getenv("DB_REPLICA_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+
+# 쓰기 직후 이 시간 동안은 해당 사용자의 읽기를 primary 로 보냄 (replica 지연 대비)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+
+class PoolWaitStats:
+    """Time spent waiting for a pooled connection (includes opening a new one when the pool is empty)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.count,
+                "avg_wait_ms": (self.total_seconds / self.count * 1000) if self.count else 0.0,
+                "max_wait_ms": self.max_seconds * 1000,
+            }
+
+
+pool_wait_stats: dict[str, PoolWaitStats] = {}
+
+
+def _create_engine(name: str, url: str, pool_size: int, max_overflow: int):
+    stats = pool_wait_stats[name] = PoolWaitStats()
+
+    class TimedQueuePool(QueuePool):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                stats.record(time.perf_counter() - started)
+
+    # MySQL 데이터베이스 연결을 위한 설정
+    # create_engine 함수의 pool_pre_ping=True 옵션은 데이터베이스 연결이 유효한지 확인
+    # pool_recycle은 지정된 시간이 경과하면 연결 풀의 연결을 재생
+    return create_engine(
+        url, poolclass=TimedQueuePool, pool_size=pool_size, max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT, pool_pre_ping=True, pool_recycle=3600
+    )
+
+
+engine = _create_engine("primary", DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW)
+replica_engine = (
+    _create_engine("replica", DATABASE_REPLICA_URL, DB_REPLICA_POOL_SIZE, DB_REPLICA_MAX_OVERFLOW)
+    if DATABASE_REPLICA_URL else engine
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
 
 Base = declarative_base()
 
+# --- Read-your-writes tracking ---
+# NOTE: 프로세스 메모리에만 기록되므로 uvicorn 워커가 여러 개면 쓰기를 처리한 워커에서만 보장된다.
+# 다른 워커로 간 읽기는 replica 로 가므로, 멀티 워커 환경에서는 sticky session 을 쓰거나
+# READ_YOUR_WRITES_SECONDS 동안의 지연을 감수해야 한다.
+# sync 엔드포인트는 스레드풀에서 실행되므로 lock 으로 보호
+_recent_writes: dict[str, float] = {}
+_recent_writes_lock = threading.Lock()
+
+
+def mark_recent_write(key: str):
+    now = time.monotonic()
+    with _recent_writes_lock:
+        for expired in [k for k, until in _recent_writes.items() if until < now]:
+            _recent_writes.pop(expired, None)
+        _recent_writes[key] = now + READ_YOUR_WRITES_SECONDS
+
+
+def has_recent_write(key: str) -> bool:
+    with _recent_writes_lock:
+        until = _recent_writes.get(key)
+    return until is not None and until >= time.monotonic()
+
+
+def get_pool_stats() -> dict:
+    engines = {"primary": engine}
+    if replica_engine is not engine:
+        engines["replica"] = replica_engine
+    return {
+        name: {**pool_wait_stats[name].snapshot(), "status": eng.pool.status()}
+        for name, eng in engines.items()
+    }
+
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -29,3 +125,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def open_read_session(prefer_primary: bool = False):
+    """Session for read-only endpoints: the replica, unless a recent write requires the primary."""
+    return SessionLocal() if prefer_primary else ReadSessionLocal()
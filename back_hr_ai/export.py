@@ -0,0 +1,157 @@
+"""
+팀 리포트 스트리밍 export (NDJSON / CSV / Parquet).
+
+server-side cursor (stream_results + yield_per) 로 EXPORT_BATCH_SIZE 행씩 읽어서
+바로 직렬화해 내보내므로 리포트 수와 상관없이 메모리 사용량이 일정하다.
+Parquet 은 pyarrow 가 설치되어 있을 때만 지원하며 배치마다 row group 하나씩 쓴다.
+"""
+import io
+import os
+import csv
+import json
+import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from database import open_read_session
+from models import User, ChatRoom, Report
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # optional dependency
+    pa = None
+    pq = None
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+COLUMNS = ["report_id", "room_id", "user_id", "username", "name", "team_id", "room_title", "created_at", "summary_content"]
+
+
+def _report_query(team_id: int, start: Optional[datetime.date], end: Optional[datetime.date], user_id: Optional[int]):
+    query = (
+        select(
+            Report.report_id, Report.room_id, User.user_id, User.username, User.name, User.team_id,
+            ChatRoom.title.label("room_title"), Report.created_at, Report.summary_content,
+        )
+        .join(ChatRoom, ChatRoom.room_id == Report.room_id)
+        .join(User, User.user_id == ChatRoom.user_id)
+        .where(User.team_id == team_id)
+        .order_by(Report.report_id)
+    )
+    if start:
+        query = query.where(Report.created_at >= datetime.datetime.combine(start, datetime.time.min))
+    if end:
+        query = query.where(Report.created_at < datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min))
+    if user_id:
+        query = query.where(User.user_id == user_id)
+    return query
+
+
+def _iter_batches(team_id, start, end, user_id) -> Iterator[list]:
+    # 요청 세션은 응답 스트리밍 전에 닫힐 수 있으므로 별도 세션을 연다
+    db = open_read_session()
+    try:
+        result = db.execute(
+            _report_query(team_id, start, end, user_id).execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+        )
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _ndjson(batches) -> Iterator[bytes]:
+    for rows in batches:
+        yield "".join(
+            json.dumps({**row._asdict(), "created_at": row.created_at.isoformat() if row.created_at else None}, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+def _csv(batches) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # Excel 에서 한글이 깨지지 않도록 BOM 추가
+    buffer.write("\ufeff")
+    writer.writerow(COLUMNS)
+    for rows in batches:
+        writer.writerows(
+            [r.report_id, r.room_id, r.user_id, r.username, r.name, r.team_id, r.room_title,
+             r.created_at.isoformat() if r.created_at else "", r.summary_content]
+            for r in rows
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the generator instead of buffering the whole file."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    return pa.schema([
+        ("report_id", pa.int64()), ("room_id", pa.int64()), ("user_id", pa.int64()),
+        ("username", pa.string()), ("name", pa.string()), ("team_id", pa.int64()),
+        ("room_title", pa.string()), ("created_at", pa.timestamp("us")), ("summary_content", pa.string()),
+    ])
+
+
+def _parquet(batches) -> Iterator[bytes]:
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def stream_team_reports(fmt: str, team_id: int, start: Optional[datetime.date] = None,
+                        end: Optional[datetime.date] = None, user_id: Optional[int] = None) -> Iterator[bytes]:
+    batches = _iter_batches(team_id, start, end, user_id)
+    if fmt == "ndjson":
+        return _ndjson(batches)
+    if fmt == "csv":
+        return _csv(batches)
+    if fmt == "parquet":
+        return _parquet(batches)
+    raise ValueError(f"Unsupported export format: {fmt}")
@@ -0,0 +1,196 @@
+"""
+벤치마크용 대용량 합성 데이터 생성기.
+
+팀/사용자/대화방/메시지/리포트를 설정한 규모로 만들어 bulk insert 한다.
+같은 --seed 로 실행하면 같은 데이터가 만들어진다.
+PK를 미리 계산해서 Core executemany 로 청크 단위 삽입하므로 ORM flush 비용이 없다.
+
+Usage:
+    python generate_data.py --teams 10 --users-per-team 20 --rooms-per-user 30 --messages-per-room 12
+    python generate_data.py --teams 50 --users-per-team 40 --rooms-per-user 250 --messages-per-room 20 --chunk-size 20000
+"""
+import random
+import datetime
+import argparse
+import time
+from itertools import islice
+
+from sqlalchemy import insert, func
+from sqlalchemy.engine import Engine
+
+from models import User, ChatRoom, Message, Report, ReportContext
+
+DEFAULT_PASSWORD = "password"
+
+WORK_DONE = [
+    "API 명세서 초안 작성", "로그인 페이지 버그 수정", "주간 회의 참석", "데이터 마이그레이션 스크립트 작성",
+    "고객사 요구사항 정리", "코드 리뷰 3건 진행", "배포 파이프라인 점검", "신규 기능 기획안 검토",
+    "테스트 케이스 보강", "대시보드 UI 개선",
+]
+BLOCKERS = [
+    "테스트 서버 접속 불가", "요구사항이 자주 바뀜", "외부 API 응답 지연", "리뷰어 부재로 머지 지연",
+    "권한 신청 승인 대기", "빌드가 간헐적으로 실패함", "디자인 시안 미확정", "내용 없음",
+]
+TOMORROW = [
+    "배포 준비", "남은 버그 수정", "기획안 다시 작성", "성능 테스트 진행", "문서화 마무리",
+    "스프린트 회고 준비", "신규 API 연동",
+]
+CONDITIONS = [
+    "컨디션 좋음", "조금 피곤함", "야근 때문에 지침", "의욕이 넘침", "스트레스가 심함",
+    "무난한 하루", "프로젝트가 엎어져서 화가 남", "내용 없음",
+]
+AI_LINES = [
+    "안녕하세요! AI 업무 비서입니다. 오늘 하루는 어떠셨나요?", "오늘 진행하신 업무를 조금 더 자세히 알려주시겠어요?",
+    "업무 중에 어려운 점은 없으셨나요?", "내일은 어떤 일을 계획하고 계신가요?", "오늘 컨디션은 어떠셨나요?",
+    "말씀해주셔서 감사합니다. 오늘 하루도 고생 많으셨어요.",
+]
+
+
+def _chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _next_id(conn, column) -> int:
+    return (conn.execute(func.max(column).select()).scalar() or 0) + 1
+
+
+def _bulk_insert(engine: Engine, model, rows, chunk_size: int) -> int:
+    total = 0
+    for chunk in _chunked(rows, chunk_size):
+        with engine.begin() as conn:
+            conn.execute(insert(model), chunk)
+        total += len(chunk)
+    return total
+
+
+def generate(engine: Engine, teams: int, users_per_team: int, rooms_per_user: int, messages_per_room: int,
+             report_ratio: float = 0.8, days: int = 365, seed: int = 42, chunk_size: int = 10000,
+             hashed_password: str | None = None) -> dict:
+    """Generate a synthetic dataset and bulk load it. Returns row counts per table."""
+    rng = random.Random(seed)
+
+    with engine.connect() as conn:
+        first_user_id = _next_id(conn, User.user_id)
+        first_room_id = _next_id(conn, ChatRoom.room_id)
+        first_message_id = _next_id(conn, Message.message_id)
+        first_report_id = _next_id(conn, Report.report_id)
+        first_context_id = _next_id(conn, ReportContext.context_id)
+        first_team_id = (conn.execute(func.max(User.team_id).select()).scalar() or 0) + 1
+
+    if hashed_password is None:
+        # bcrypt 는 느리므로 한 번만 해시해서 모든 사용자에게 재사용
+        import bcrypt
+        hashed_password = bcrypt.hashpw(DEFAULT_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+    now = datetime.datetime.now().replace(microsecond=0)
+
+    users = []
+    for t in range(teams):
+        for u in range(users_per_team):
+            user_id = first_user_id + len(users)
+            users.append({
+                "user_id": user_id,
+                "username": f"bench_user_{user_id}",
+                "hashed_password": hashed_password,
+                "name": f"사용자{user_id}",
+                "team_id": first_team_id + t,
+                "role": "팀장" if u == 0 else "팀원",
+            })
+    counts = {"users": _bulk_insert(engine, User, users, chunk_size)}
+
+    # 대화방 메타데이터는 메시지/리포트/컨텍스트 생성에 다시 쓰이므로 (id, 생성일, 리포트 여부)만 유지
+    rooms = []
+    for user in users:
+        for r in range(rooms_per_user):
+            created_at = now - datetime.timedelta(days=rng.randrange(days), seconds=rng.randrange(86400))
+            rooms.append((first_room_id + len(rooms), user["user_id"], created_at, rng.random() < report_ratio))
+
+    counts["rooms"] = _bulk_insert(engine, ChatRoom, (
+        {"room_id": room_id, "user_id": user_id, "title": f"대화 {created_at:%Y-%m-%d %H:%M}", "created_at": created_at}
+        for room_id, user_id, created_at, _ in rooms
+    ), chunk_size)
+
+    def contexts():
+        for i, (room_id, _, created_at, _) in enumerate(rooms):
+            yield {
+                "context_id": first_context_id + i,
+                "room_id": room_id,
+                "work_done": "\n".join(rng.sample(WORK_DONE, 2)),
+                "blockers": rng.choice(BLOCKERS),
+                "tomorrow_plan": rng.choice(TOMORROW),
+                "condition": rng.choice(CONDITIONS),
+                "last_updated": created_at,
+            }
+    counts["report_contexts"] = _bulk_insert(engine, ReportContext, contexts(), chunk_size)
+
+    def messages():
+        message_id = first_message_id
+        for room_id, _, created_at, _ in rooms:
+            for m in range(messages_per_room):
+                is_ai = m % 2 == 0
+                yield {
+                    "message_id": message_id,
+                    "room_id": room_id,
+                    "sender": "ai" if is_ai else "user",
+                    "content": rng.choice(AI_LINES) if is_ai else f"{rng.choice(WORK_DONE)} 했고, {rng.choice(BLOCKERS)}. {rng.choice(CONDITIONS)}.",
+                    "created_at": created_at + datetime.timedelta(seconds=30 * m),
+                }
+                message_id += 1
+    counts["messages"] = _bulk_insert(engine, Message, messages(), chunk_size)
+
+    def reports():
+        report_id = first_report_id
+        for room_id, _, created_at, has_report in rooms:
+            if not has_report:
+                continue
+            yield {
+                "report_id": report_id,
+                "room_id": room_id,
+                "summary_content": (
+                    f"## 오늘 완료한 업무\n- {rng.choice(WORK_DONE)}\n- {rng.choice(WORK_DONE)}\n\n"
+                    f"## 이슈 및 블로커\n- {rng.choice(BLOCKERS)}\n\n"
+                    f"## 내일 계획\n- {rng.choice(TOMORROW)}\n\n"
+                    f"## 오늘의 컨디션\n- {rng.choice(CONDITIONS)}\n"
+                ),
+                "created_at": created_at + datetime.timedelta(seconds=30 * messages_per_room + 60),
+            }
+            report_id += 1
+    counts["reports"] = _bulk_insert(engine, Report, reports(), chunk_size)
+
+    counts["first_user_id"] = first_user_id
+    counts["first_team_id"] = first_team_id
+    return counts
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--teams", type=int, default=5)
+    parser.add_argument("--users-per-team", type=int, default=10)
+    parser.add_argument("--rooms-per-user", type=int, default=20)
+    parser.add_argument("--messages-per-room", type=int, default=10)
+    parser.add_argument("--report-ratio", type=float, default=0.8, help="fraction of rooms that get a report")
+    parser.add_argument("--days", type=int, default=365, help="spread room creation dates over this many days")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows per executemany batch")
+
+
+if __name__ == "__main__":
+    from database import Base, engine
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic HR-AI dataset for benchmarking.")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    result = generate(
+        engine, args.teams, args.users_per_team, args.rooms_per_user, args.messages_per_room,
+        report_ratio=args.report_ratio, days=args.days, seed=args.seed, chunk_size=args.chunk_size,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"Generated in {elapsed:.1f}s: " + ", ".join(f"{k}={v}" for k, v in result.items()))
+    print(f"All generated users share the password '{DEFAULT_PASSWORD}'.")
@@ -3,7 +3,9 @@ import datetime
 import json
 import asyncio
 import google.generativeai as genai
-from fastapi import FastAPI, HTTPException, Depends, status
+from google.api_core import exceptions as google_exceptions
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, BackgroundTasks, Request, status
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, ConfigDict
@@ -11,13 +13,22 @@ from dotenv import load_dotenv
 import openai
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 import bcrypt
 from jose import JWTError, jwt
 
 from typing import List, Dict, Optional, Union
 
-from database import Base, engine, get_db
-from models import User, Message, Report, ChatRoom, ReportContext
+from database import Base, engine, get_db, open_read_session, mark_recent_write, has_recent_write, get_pool_stats
+from models import User, Message, Report, ChatRoom, ReportContext, MessageArchive, MemberMood
+from archive import get_room_messages
+from singleflight import run_idempotent, content_key, IdempotencyConflict
+from mood_analytics import refresh_users_task, refresh_team_task, needs_refresh, team_mood_summary
+from blocker_index import index_room_task, remove_room, top_recurring_blockers
+from model_router import ModelRouter, ModelSpec, ModelRouterError, TIER_FAST, TIER_HIGH
+import profiling
+from export import stream_team_reports, parquet_available, EXPORT_FORMATS
+from prompts import Prompt, prompt_cache_stats, TRIAGE_PROMPT, CHAT_RESPONSE_PROMPT, REPORT_PROMPT, TITLE_PROMPT
 
 # --- App Initialization ---
 load_dotenv()
@@ -30,6 +41,7 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto") # Removed passlib
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login", auto_error=False)
 
 def verify_password(plain_password, hashed_password):
     # bcrypt.checkpw requires bytes
@@ -55,6 +67,9 @@ def create_access_token(data: dict, expires_delta: datetime.timedelta | None = N
     return encoded_jwt
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    return _user_from_token(token, db)
+
+def _user_from_token(token: str, db: Session):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -72,6 +87,50 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         raise credentials_exception
     return user
 
+def get_read_db(token: Optional[str] = Depends(optional_oauth2_scheme)):
+    # 읽기 전용 엔드포인트용 세션 (replica). 방금 쓰기를 한 사용자는 read-your-writes 를 위해 primary 로 보냄.
+    # 토큰 검증은 get_current_user 가 담당하므로 여기서는 user_id 만 꺼내 본다.
+    user_id = None
+    if token:
+        try:
+            user_id = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("user_id")
+        except JWTError:
+            pass
+    db = open_read_session(prefer_primary=user_id is not None and has_recent_write(f"user:{user_id}"))
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_current_read_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)):
+    # 읽기 엔드포인트용: 인증 조회도 같은 read 세션(replica)을 사용해서 primary 커넥션을 잡지 않음
+    return _user_from_token(token, db)
+
+# --- On-demand Profiling Middleware ---
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    if not profiling.is_profiled_path(request.method, request.url.path):
+        return await call_next(request)
+
+    reason = None
+    if request.headers.get("x-profile") == "1":
+        # 관리자 토큰으로 요청한 경우에만 헤더로 프로파일링 허용
+        auth = request.headers.get("authorization", "")
+        try:
+            if auth.lower().startswith("bearer ") and jwt.decode(auth[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("role") == "관리자":
+                reason = "header"
+        except JWTError:
+            pass
+    if reason is None and profiling.sampled():
+        reason = "sampled"
+    if reason is None:
+        return await call_next(request)
+
+    async with profiling.profile_request(request.method, request.url.path, reason) as session:
+        response = await call_next(request)
+    response.headers["X-Profile-Id"] = session.profile_id
+    return response
+
 # --- CORS Middleware ---
 app.add_middleware(
     CORSMiddleware,
@@ -87,6 +146,11 @@ api_keys = {
     "openai": os.getenv("OPENAI_API_KEY"),
 }
 
+# Gemini explicit context caching (prefix 가 모델별 최소 토큰 수 이상일 때만 동작). 기본은 implicit caching 에 맡김.
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() == "true"
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+GEMINI_CONTEXT_CACHE_RETRY_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_RETRY_SECONDS", "300"))
+
 # --- Database Initialization on Startup ---
 @app.on_event("startup")
 def startup_event():
@@ -190,47 +254,106 @@ class ChatResponseWithReportStatus(BaseModel):
 
 
 # --- AI Model Caller Functions ---
-async def call_gemini(prompt: str):
-    api_key = api_keys.get("gemini")
-    if not api_key: return {"model": "gemini", "response": "Gemini API key is not configured."}
-    genai.configure(api_key=api_key)
+# (model_name, prompt cache_key) -> (CachedContent, expires_at)
+# 생성에 실패하면 (None, 재시도 가능 시각) 을 기록 - 지원하지 않는 경우(prefix 가 최소 토큰 수 미만 등)는 재시도하지 않음
+_gemini_context_caches: dict[tuple[str, str], tuple[Optional[object], datetime.datetime]] = {}
+
+async def _gemini_cached_model(model_name: str, prompt: Prompt, generation_config):
+    key = (model_name, prompt.cache_key)
+    entry = _gemini_context_caches.get(key)
+    if entry is not None and entry[1] > datetime.datetime.now():
+        if entry[0] is None:
+            return None
+        return genai.GenerativeModel.from_cached_content(cached_content=entry[0], generation_config=generation_config)
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-lite-001')
-        response = await model.generate_content_async(prompt)
-        return {"model": "gemini", "response": response.text}
-    except Exception as e: return {"model": "gemini", "response": f"API call failed: {str(e)}"}
-
-async def call_triage_ai(prompt: str):
-    api_key = api_keys.get("gemini")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="Gemini API key is not configured.")
-    genai.configure(api_key=api_key)
-    try:
-        # NOTE: 1단계 분석과 1단계 채팅 응답 모두 사용자가 지정한 Gemini 2.0 Flash 모델을 사용합니다.
-        model = genai.GenerativeModel(
-            'gemini-2.0-flash-lite',
-            generation_config={"response_mime_type": "application/json"}
+        ttl = datetime.timedelta(seconds=GEMINI_CONTEXT_CACHE_TTL_SECONDS)
+        cached = await asyncio.to_thread(
+            genai.caching.CachedContent.create,
+            model=f"models/{model_name}", display_name=prompt.cache_key, contents=[prompt.prefix], ttl=ttl
         )
-        response = await model.generate_content_async(prompt)
-        return json.loads(response.text)
+    except google_exceptions.InvalidArgument as e:
+        # prefix 가 너무 짧거나 모델이 캐싱을 지원하지 않음 - 다시 시도해도 같으므로 끔
+        print(f"[WARN] Gemini context cache unsupported for {model_name}/{prompt.template}: {e}")
+        _gemini_context_caches[key] = (None, datetime.datetime.max)
+        return None
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Triage AI call with Gemini failed: {str(e)}")
+        # 타임아웃/5xx 등 일시적인 오류 - 잠시 뒤 다시 시도
+        print(f"[WARN] Gemini context cache unavailable for {model_name}/{prompt.template}: {e}")
+        _gemini_context_caches[key] = (None, datetime.datetime.now() + datetime.timedelta(seconds=GEMINI_CONTEXT_CACHE_RETRY_SECONDS))
+        return None
+    # 만료 직전에 쓰지 않도록 여유를 둠
+    _gemini_context_caches[key] = (cached, datetime.datetime.now() + ttl - datetime.timedelta(seconds=60))
+    return genai.GenerativeModel.from_cached_content(cached_content=cached, generation_config=generation_config)
+
+async def _gemini_generate(model_name: str, prompt: Prompt, json_mode: bool) -> str:
+    genai.configure(api_key=api_keys.get("gemini"))
+    generation_config = {"response_mime_type": "application/json"} if json_mode else None
+    model = await _gemini_cached_model(model_name, prompt, generation_config) if GEMINI_CONTEXT_CACHE else None
+    if model is not None:
+        response = await model.generate_content_async(prompt.suffix)
+    else:
+        model = genai.GenerativeModel(model_name, generation_config=generation_config)
+        response = await model.generate_content_async(prompt.text)
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        prompt_cache_stats.record(prompt.template, model_name, usage.prompt_token_count, getattr(usage, "cached_content_token_count", 0))
+    return response.text
+
+async def _openai_generate(model_name: str, prompt: Prompt, json_mode: bool) -> str:
+    # NOTE: 트리아지는 JSON 배열을 요구하므로 json_object response_format 은 쓰지 않고 프롬프트 지시에 맡긴다.
+    # OpenAI 는 동일한 prefix 를 자동으로 캐싱하며, prompt_cache_key 로 같은 템플릿 요청을 같은 캐시로 모은다.
+    client = openai.AsyncOpenAI(api_key=api_keys.get("openai"))
+    chat_completion = await client.chat.completions.create(
+        messages=[{"role": "user", "content": prompt.text}],
+        model=model_name,
+        extra_body={"prompt_cache_key": prompt.cache_key}
+    )
+    usage = chat_completion.usage
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        prompt_cache_stats.record(prompt.template, model_name, usage.prompt_tokens, getattr(details, "cached_tokens", 0) if details else 0)
+    return chat_completion.choices[0].message.content
+
+def _parse_json_response(text: str):
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return json.loads(text)
+
+# 품질 등급(tier)별 후보 모델. 원래 쓰던 모델이 기본 선택이고, 느려지거나 실패하면 다른 모델/프로바이더로 넘어간다.
+model_router = ModelRouter([
+    ModelSpec("gemini-2.0-flash-lite-001", "gemini", TIER_FAST, _gemini_generate, expected_latency=1.5, enabled=bool(api_keys["gemini"])),
+    ModelSpec("gemini-2.0-flash-lite", "gemini", TIER_FAST, _gemini_generate, expected_latency=1.5, enabled=bool(api_keys["gemini"])),
+    ModelSpec("gpt-5-mini", "openai", TIER_FAST, _openai_generate, expected_latency=4.0, enabled=bool(api_keys["openai"])),
+    ModelSpec("gpt-5.1", "openai", TIER_HIGH, _openai_generate, expected_latency=15.0, enabled=bool(api_keys["openai"])),
+    ModelSpec("gemini-2.5-pro", "gemini", TIER_HIGH, _gemini_generate, expected_latency=20.0, enabled=bool(api_keys["gemini"])),
+])
+
+async def call_gemini(prompt: Prompt):
+    try:
+        model_name, text = await model_router.generate(TIER_FAST, prompt, preferred="gemini-2.0-flash-lite-001")
+        return {"model": model_name, "response": text}
+    except ModelRouterError as e: return {"model": "gemini", "response": f"API call failed: {str(e)}"}
+
+async def call_triage_ai(prompt: Prompt):
+    try:
+        # NOTE: 1단계 분석과 1단계 채팅 응답 모두 사용자가 지정한 Gemini 2.0 Flash 모델을 우선 사용합니다.
+        model_name, text = await model_router.generate(TIER_FAST, prompt, json_mode=True, preferred="gemini-2.0-flash-lite")
+        return _parse_json_response(text)
+    except ModelRouterError as e:
+        raise HTTPException(status_code=503, detail=f"Triage AI is unavailable: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=502, detail=f"Triage AI returned invalid JSON: {str(e)}")
 
 
 
-async def call_report_ai(prompt: str):
-    api_key = api_keys.get("openai")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="OpenAI API key is not configured.")
-    client = openai.AsyncOpenAI(api_key=api_key)
+async def call_report_ai(prompt: Prompt):
     try:
-        chat_completion = await client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="gpt-5.1"
-        )
-        return chat_completion.choices[0].message.content
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Report AI call failed: {str(e)}")
+        model_name, text = await model_router.generate(TIER_HIGH, prompt, preferred="gpt-5.1")
+        return text
+    except ModelRouterError as e:
+        raise HTTPException(status_code=503, detail=f"Report AI is unavailable: {str(e)}")
 
 # --- API Endpoints ---
 @app.post("/api/v1/login", response_model=Token)
@@ -260,7 +383,7 @@ def read_root():
 
 # --- ChatRoom Management Endpoints ---
 @app.get("/api/v1/chat_rooms", response_model=list[ChatRoomResponse])
-def get_chat_rooms(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_chat_rooms(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_read_user)):
     chat_rooms = db.query(ChatRoom).filter(ChatRoom.user_id == current_user.user_id).order_by(ChatRoom.created_at.desc()).all()
     return chat_rooms
 
@@ -279,6 +402,7 @@ def create_chat_room(db: Session = Depends(get_db), current_user: User = Depends
     
     db.commit()
     db.refresh(new_room)
+    mark_recent_write(f"user:{current_user.user_id}")
     return new_room
 
 @app.delete("/api/v1/chat_rooms/{room_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -294,7 +418,13 @@ def delete_chat_room(room_id: int, db: Session = Depends(get_db), current_user:
     
     # Delete messages
     db.query(Message).filter(Message.room_id == room_id).delete()
+
+    # Delete archived messages
+    db.query(MessageArchive).filter(MessageArchive.room_id == room_id).delete()
     
+    # Delete indexed blocker fragments (and refresh their clusters)
+    remove_room(db, room_id)
+
     # Delete report context
     db.query(ReportContext).filter(ReportContext.room_id == room_id).delete()
 
@@ -305,6 +435,7 @@ def delete_chat_room(room_id: int, db: Session = Depends(get_db), current_user:
 
     db.delete(chat_room)
     db.commit()
+    mark_recent_write(f"user:{current_user.user_id}")
     return None
 
 @app.put("/api/v1/chat_rooms/{room_id}", response_model=ChatRoomResponse)
@@ -316,13 +447,17 @@ def update_chat_room(room_id: int, request: ChatRoomUpdate, db: Session = Depend
     chat_room.title = request.title
     db.commit()
     db.refresh(chat_room)
+    mark_recent_write(f"user:{current_user.user_id}")
     return chat_room
 
 @app.get("/api/v1/chat_rooms/{room_id}", response_model=ChatRoomDetailResponse)
-def get_chat_room_details(room_id: int, db: Session = Depends(get_db)):
-    chat_room = db.query(ChatRoom).options(joinedload(ChatRoom.messages)).filter(ChatRoom.room_id == room_id).first()
+def get_chat_room_details(room_id: int, db: Session = Depends(get_read_db)):
+    chat_room = db.query(ChatRoom).filter(ChatRoom.room_id == room_id).first()
     if not chat_room:
         raise HTTPException(status_code=404, detail="Chat room not found")
+
+    # Hot table + archive (오래된 방은 MessageArchives에 압축 보관됨)
+    messages = get_room_messages(db, room_id)
     
     # Calculate report_status
     report_context = chat_room.report_context
@@ -354,14 +489,29 @@ def get_chat_room_details(room_id: int, db: Session = Depends(get_db)):
         user_id=chat_room.user_id,
         title=chat_room.title,
         created_at=chat_room.created_at,
-        messages=[MessageResponse.model_validate(m) for m in chat_room.messages],
+        messages=[MessageResponse.model_validate(m) for m in messages],
         report_status=report_status_data,
         has_report=has_report
     )
 
 
 @app.post("/api/v1/chat_rooms/{room_id}/messages", response_model=ChatResponseWithReportStatus)
-async def intelligent_chat(room_id: int, request: ChatRequest, db: Session = Depends(get_db)):
+async def intelligent_chat(room_id: int, request: ChatRequest, background_tasks: BackgroundTasks, idempotency_key: Optional[str] = Header(default=None), db: Session = Depends(get_db)):
+    # 재시도/더블클릭으로 들어온 동일 요청은 (Idempotency-Key 와 상관없이) 하나의 트리아지+응답 생성을 공유한다.
+    # Idempotency-Key 가 있으면 완료된 응답도 TTL 동안 재사용 (메시지 중복 저장 방지)
+    # 키는 방 주인 기준으로 스코프하고, 같은 키를 다른 메시지로 재사용하면 이전 응답을 재생하지 않고 422
+    room_owner_id = db.query(ChatRoom.user_id).filter(ChatRoom.room_id == room_id).scalar()
+    if room_owner_id is None:
+        raise HTTPException(status_code=404, detail="Chat room not found")
+    prompt_key = content_key(request.prompt)
+    flight_key = f"chat:user:{room_owner_id}:room:{room_id}:{prompt_key}"
+    try:
+        return await run_idempotent(flight_key, lambda: _intelligent_chat(room_id, request, db, background_tasks), idempotency_key, fingerprint=prompt_key)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different message.")
+
+
+async def _intelligent_chat(room_id: int, request: ChatRequest, db: Session, background_tasks: BackgroundTasks):
     # 1. Find the chat room and its context
     chat_room = db.query(ChatRoom).filter(ChatRoom.room_id == room_id).first()
     if not chat_room:
@@ -391,58 +541,11 @@ async def intelligent_chat(room_id: int, request: ChatRequest, db: Session = Dep
         # 3. Triage Stage (Analyze user message)
         current_summary_text = f"- 오늘 한 일: {report_context.work_done}\n- 이슈 및 블로커: {report_context.blockers}\n- 내일 할 일: {report_context.tomorrow_plan}\n- 컨디션: {report_context.condition}"
         
-        triage_prompt = f"""You are a message analysis expert. Your task is to analyze the user's message and respond in a structured JSON array format. Follow these rules precisely:
-
-1.  **SEGMENTATION**: If the user's message contains multiple distinct topics (e.g., condition, task, issue), you MUST break the single input message into these separate logical units.
-2.  **CATEGORIZATION**: For each segmented logical unit, you MUST identify ALL valid categories that the unit relates to. The valid categories are: "오늘 한 일", "이슈 및 블로커", "내일 할 일", "컨디션", "잡담".
-3.  **PROFANITY DETECTION**: For each segmented unit, you MUST analyze for any abusive, offensive, or profane language. Set the `profanity_detected` boolean flag to `true` if found, otherwise `false`.
-4.  **NEGATIVE/NON-COMMITTAL ANSWERS**: If the user provides a negative or non-committal answer (e.g., "없었어", "아니", "기억 안나", "별거 없어"), you MUST record the `content` for the relevant category as "내용 없음". Do not categorize it as "잡담".
-5.  **OUTPUT**: Respond ONLY in a JSON Array format. Each element must be a JSON object containing `category`, `content`, and `profanity_detected`.
-
-Current Summary Status:
-{current_summary_text}
-
-Conversation History (Last 10 messages):
-{conversation_history}
-
-User's latest message: "{request.prompt}"
-
----
-**Example 1: Complex message**
-User Input: "프로젝트를 3번째 엎었어. 진짜 빡치네. 내일은 다시 시작해야지."
-Your Output:
-[
-  {{
-    "category": "이슈 및 블로커",
-    "content": "프로젝트를 3번째 엎었어.",
-    "profanity_detected": true
-  }},
-  {{
-    "category": "컨디션",
-    "content": "프로젝트를 3번째 엎었어. 진짜 빡치네.",
-    "profanity_detected": true
-  }},
-  {{
-    "category": "내일 할 일",
-    "content": "내일은 다시 시작해야지.",
-    "profanity_detected": false
-  }}
-]
-
-**Example 2: Negative answer**
-User Input: "오늘 뭐 딱히 한 거 없어."
-Your Output:
-[
-  {{
-    "category": "오늘 한 일",
-    "content": "내용 없음",
-    "profanity_detected": false
-  }}
-]
----
-
-Your JSON Array Output:
-"""
+        triage_prompt = TRIAGE_PROMPT.render(
+            current_summary_text=current_summary_text,
+            conversation_history=conversation_history,
+            user_message=request.prompt
+        )
         triage_results = await call_triage_ai(triage_prompt)
         
         # 4. Update ReportContext based on triage results
@@ -491,9 +594,10 @@ Your JSON Array Output:
         missing_items_for_prompt = [cat for cat, status in report_status_data.items() if status == "missing"]
 
         if missing_items_for_prompt:
-            response_prompt = f"You are a friendly AI assistant. You MUST respond in Korean. Your goal is to gather information for a work report. Ask a natural follow-up question to gather information about '{missing_items_for_prompt[0]}'.\n\nConversation History:\n{conversation_history}\n\nUser's last message: '{request.prompt}'"
+            instruction = f"Ask a natural follow-up question to gather information about '{missing_items_for_prompt[0]}'."
         else:
-            response_prompt = f"You are a friendly AI assistant. You MUST respond in Korean. You have gathered all necessary information for this topic. Politely conclude the conversation for this specific topic.\n\nConversation History:\n{conversation_history}\n\nUser's last message: '{request.prompt}'"
+            instruction = "You have gathered all necessary information for this topic. Politely conclude the conversation for this specific topic."
+        response_prompt = CHAT_RESPONSE_PROMPT.render(instruction=instruction, conversation_history=conversation_history, user_message=request.prompt)
         
         response_data = await call_gemini(response_prompt)
         ai_response_content = response_data['response']
@@ -504,8 +608,13 @@ Your JSON Array Output:
         
         db.commit()
         db.refresh(ai_message)
+        mark_recent_write(f"user:{chat_room.user_id}")
+
+        # 컨디션/블로커가 바뀌었으면 팀 대시보드용 지표를 응답 이후에 재계산
+        if condition_list or blockers_list:
+            background_tasks.add_task(refresh_users_task, [chat_room.user_id])
         
-        return ChatResponseWithReportStatus(message=ai_message, report_status=report_status_data)
+        return ChatResponseWithReportStatus(message=MessageResponse.model_validate(ai_message), report_status=report_status_data)
 
     except HTTPException as e:
         db.rollback()
@@ -519,7 +628,12 @@ Your JSON Array Output:
 
 
 @app.post("/api/v1/chat_rooms/{room_id}/reports")
-async def generate_report(room_id: int, db: Session = Depends(get_db)):
+async def generate_report(room_id: int, background_tasks: BackgroundTasks, idempotency_key: Optional[str] = Header(default=None), db: Session = Depends(get_db)):
+    # 같은 방에 대한 동시 요청은 Idempotency-Key 가 달라도 gpt-5.1 호출을 한 번만 하고 결과를 공유한다.
+    return await run_idempotent(f"report:{room_id}", lambda: _generate_report(room_id, db, background_tasks), idempotency_key)
+
+
+async def _generate_report(room_id: int, db: Session, background_tasks: BackgroundTasks):
     print(f"\n--- [REPORT GENERATION START FOR ROOM: {room_id}] ---")
     
     report_context = db.query(ReportContext).filter(ReportContext.room_id == room_id).first()
@@ -551,21 +665,12 @@ async def generate_report(room_id: int, db: Session = Depends(get_db)):
         )
 
     print(f"[DEBUG] Data found for room {room_id}. Proceeding to generate report.")
-    report_prompt = f"""You are an expert HR analyst and report writer. Your task is to synthesize the following raw daily notes from a team member into a clear, concise, and insightful daily report.
-
-[Raw Data from Daily Summary]
-- 오늘 한 일: {report_context.work_done}
-- 이슈 및 블로커: {report_context.blockers}
-- 내일 할 일: {report_context.tomorrow_plan}
-- 컨디션: {report_context.condition}
-
-[Report Writing Instructions]
-1.  **Structure:** Organize the report into the following sections using markdown: "오늘 완료한 업무", "이슈 및 블로커", "내일 계획", "오늘의 컨디션".
-2.  **Synthesize and Refine:** Do not just copy-paste the raw data. Rephrase the points in a professional and easy-to-read manner. If the raw data is messy or contains multiple points, consolidate them into clear bullet points.
-3.  **Insightful Summary (Condition):** For the "오늘의 컨디션" section, don't just state the condition. Provide a brief, objective summary of the user's emotional state based on the provided data.
-4.  **Tone:** Maintain a neutral, professional, and supportive tone.
-Generate the report in Korean.
-"""
+    report_prompt = REPORT_PROMPT.render(
+        work_done=report_context.work_done,
+        blockers=report_context.blockers,
+        tomorrow_plan=report_context.tomorrow_plan,
+        condition=report_context.condition
+    )
     
     summary_content = await call_report_ai(report_prompt)
 
@@ -574,14 +679,7 @@ Generate the report in Korean.
     
     # --- Auto-generate Title ---
     try:
-        title_prompt = f"""
-        Based on the following daily report summary, generate a short, concise, and relevant title for this chat room (max 20 characters).
-        The title should represent the main topic or the day's work.
-        Do not use quotes or markdown. Just the title text.
-        
-        [Report Summary]
-        {summary_content}
-        """
+        title_prompt = TITLE_PROMPT.render(summary_content=summary_content)
         new_title = await call_report_ai(title_prompt)
         new_title = new_title.strip()[:50] # Safety truncation
         
@@ -594,24 +692,34 @@ Generate the report in Korean.
         print(f"[ERROR] Failed to auto-generate title: {e}")
         # Don't fail the report generation if title fails
     
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Reports.room_id unique 제약 - 다른 워커가 먼저 리포트를 저장한 경우
+        db.rollback()
+        raise HTTPException(status_code=400, detail="이미 리포트가 생성된 대화입니다.")
     db.refresh(db_report)
     
     # Fetch updated chat room title to return
     updated_room = db.query(ChatRoom).filter(ChatRoom.room_id == room_id).first()
     room_title = updated_room.title if updated_room else "대화"
+    if updated_room:
+        mark_recent_write(f"user:{updated_room.user_id}")
+
+    # 반복 블로커 탐지용 색인은 응답 이후에 수행
+    background_tasks.add_task(index_room_task, room_id)
 
     print(f"--- [REPORT GENERATION END FOR ROOM: {room_id}] ---")
     return {"report_id": db_report.report_id, "room_title": room_title, "summary_content": db_report.summary_content}
 
 @app.get("/api/v1/reports")
-def get_reports(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_reports(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_read_user)):
     # Query all reports for the current user, joining through ChatRoom
     reports = db.query(Report).join(ChatRoom).filter(ChatRoom.user_id == current_user.user_id).order_by(Report.created_at.desc()).all()
     return reports
 
 @app.get("/api/v1/team/reports")
-def get_team_reports(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_team_reports(background_tasks: BackgroundTasks, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_read_user)):
     if current_user.role != "팀장" and current_user.role != "임원":
         raise HTTPException(status_code=403, detail="권한이 없습니다.")
     
@@ -645,6 +753,11 @@ def get_team_reports(db: Session = Depends(get_db), current_user: User = Depends
     
     team_members = db.query(User).filter(User.team_id == current_user.team_id).all()
     
+    # Materialized mood analytics (mood_analytics.py) - 팀원 수만큼만 읽음
+    moods = {m.user_id: m for m in db.query(MemberMood).filter(MemberMood.user_id.in_([m.user_id for m in team_members])).all()}
+    if needs_refresh(list(moods.values()), len(team_members)):
+        background_tasks.add_task(refresh_team_task, current_user.team_id)
+
     dashboard_data = []
     for member in team_members:
         # Get latest report
@@ -657,13 +770,66 @@ def get_team_reports(db: Session = Depends(get_db), current_user: User = Depends
                 "role": member.role,
                 "team_id": member.team_id
             },
-            "latest_report": latest_report
+            "latest_report": latest_report,
+            "mood": moods.get(member.user_id)
         })
         
     return dashboard_data
 
+@app.get("/api/v1/team/mood")
+def get_team_mood(background_tasks: BackgroundTasks, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_read_user)):
+    if current_user.role != "팀장" and current_user.role != "임원":
+        raise HTTPException(status_code=403, detail="권한이 없습니다.")
+    if not current_user.team_id:
+        raise HTTPException(status_code=404, detail="소속된 팀이 없습니다.")
+    summary = team_mood_summary(db, current_user.team_id)
+    # 채팅이 없는 팀원의 최근 N일 지표가 낡지 않도록 오래된 경우 응답 이후 팀 전체 재계산
+    member_count = db.query(func.count(User.user_id)).filter(User.team_id == current_user.team_id).scalar()
+    if needs_refresh(summary["members"], member_count):
+        background_tasks.add_task(refresh_team_task, current_user.team_id)
+    return summary
+
+@app.get("/api/v1/team/blockers")
+def get_team_recurring_blockers(limit: int = Query(10, ge=1, le=50), days: Optional[int] = Query(None, ge=1), db: Session = Depends(get_read_db), current_user: User = Depends(get_current_read_user)):
+    if current_user.role != "팀장" and current_user.role != "임원":
+        raise HTTPException(status_code=403, detail="권한이 없습니다.")
+    if not current_user.team_id:
+        raise HTTPException(status_code=404, detail="소속된 팀이 없습니다.")
+    # blocker_index.py 가 미리 만들어 둔 클러스터를 팀원 수 / 날짜 수 순으로 반환
+    return top_recurring_blockers(db, current_user.team_id, limit=limit, days=days)
+
+@app.get("/api/v1/team/reports/export")
+def export_team_reports(
+    format: str = "ndjson",
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    user_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    current_user: User = Depends(get_current_read_user)
+):
+    # NOTE: /api/v1/team/reports/{user_id} 보다 먼저 선언해야 "export" 가 user_id 로 매칭되지 않음
+    if current_user.role != "팀장" and current_user.role != "임원":
+        raise HTTPException(status_code=403, detail="권한이 없습니다.")
+
+    # 팀장은 자기 팀만, 임원은 team_id 로 다른 팀도 조회 가능
+    target_team_id = team_id if (team_id and current_user.role == "임원") else current_user.team_id
+    if not target_team_id:
+        raise HTTPException(status_code=404, detail="소속된 팀이 없습니다.")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 형식입니다: {format} (ndjson, csv, parquet)")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow to be installed.")
+
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"team_{target_team_id}_reports.{extension}"
+    return StreamingResponse(
+        stream_team_reports(format, target_team_id, start=start, end=end, user_id=user_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.get("/api/v1/team/reports/{user_id}")
-def get_team_member_reports(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_team_member_reports(user_id: int, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_read_user)):
     if current_user.role != "팀장" and current_user.role != "임원":
         raise HTTPException(status_code=403, detail="권한이 없습니다.")
     
@@ -711,14 +877,51 @@ def get_team_member_reports(user_id: int, db: Session = Depends(get_db), current
     return team_status_list
 
 @app.get("/api/v1/reports/{report_id}")
-def get_report(report_id: int, db: Session = Depends(get_db)):
-    report = db.query(Report).options(joinedload(Report.chat_room).options(joinedload(ChatRoom.messages))).filter(Report.report_id == report_id).first()
+def get_report(report_id: int, db: Session = Depends(get_read_db)):
+    report = db.query(Report).options(joinedload(Report.chat_room)).filter(Report.report_id == report_id).first()
     if not report: raise HTTPException(status_code=404, detail="Report not found")
     
-    # The original messages can be fetched via the chat_room
-    messages = report.chat_room.messages
+    # The original messages can be fetched via the chat_room (falls back to the archive for old rooms)
+    messages = get_room_messages(db, report.room_id)
     return {"report": report, "messages": messages}
 
+@app.get("/api/v1/admin/db-stats")
+def get_db_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != "관리자":
+        raise HTTPException(status_code=403, detail="권한이 없습니다.")
+    # 엔진별 커넥션 풀 대기 시간과 풀 상태
+    return get_pool_stats()
+
+@app.get("/api/v1/admin/model-stats")
+def get_model_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != "관리자":
+        raise HTTPException(status_code=403, detail="권한이 없습니다.")
+    # 모델별 최근 지연 시간(p50/p95), 오류율, 정상 여부
+    return model_router.snapshot()
+
+@app.get("/api/v1/admin/prompt-cache-stats")
+def get_prompt_cache_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != "관리자":
+        raise HTTPException(status_code=403, detail="권한이 없습니다.")
+    # 템플릿/모델별 전체 프롬프트 토큰 대비 캐시된 토큰
+    return prompt_cache_stats.snapshot()
+
+@app.get("/api/v1/admin/profiles")
+def get_profiles(current_user: User = Depends(get_current_user)):
+    if current_user.role != "관리자":
+        raise HTTPException(status_code=403, detail="권한이 없습니다.")
+    return profiling.list_profiles()
+
+@app.get("/api/v1/admin/profiles/{profile_id}")
+def download_profile(profile_id: str, format: str = "json", current_user: User = Depends(get_current_user)):
+    if current_user.role != "관리자":
+        raise HTTPException(status_code=403, detail="권한이 없습니다.")
+    # format=json: 요약 + SQL/LLM 타임라인 + 텍스트 프로파일, format=html: pyinstrument HTML
+    path = profiling.profile_path(profile_id, format)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=f"{profile_id}.{format}")
+
 @app.get("/reset-database")
 def reset_database(db: Session = Depends(get_db)):
     """
@@ -747,6 +950,7 @@ def generate_test_data(db: Session = Depends(get_db)):
     user = db.query(User).filter(User.user_id == user_id).first()
     if user:
         for room in user.chat_rooms:
+            remove_room(db, room.room_id)
             db.delete(room)
     db.commit()
 
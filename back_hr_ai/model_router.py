@@ -0,0 +1,177 @@
+"""
+지연 시간 기반 LLM 모델 라우터.
+
+모델별로 최근 지연 시간/오류율을 추적해서
+- 작업의 품질 등급(tier)을 만족하는 모델 중 가장 빠른 정상 모델로 먼저 보내고
+- 첫 요청이 그 모델의 p95 지연을 넘기면 다음 후보에게 hedge 요청을 보내 먼저 끝난 결과를 쓰며
+- 실패하면 다른 모델/프로바이더로 fallback 한다.
+
+프로바이더 호출 함수는 main.py 에서 등록한다 (ModelSpec.call).
+"""
+import os
+import time
+import asyncio
+import statistics
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from profiling import record_span
+
+TIER_FAST = 1 # 채팅 응답 / 트리아지
+TIER_HIGH = 2 # 리포트 작성
+
+STATS_WINDOW = int(os.getenv("MODEL_STATS_WINDOW", "50"))
+MIN_SAMPLES = 5
+MAX_ERROR_RATE = float(os.getenv("MODEL_MAX_ERROR_RATE", "0.5"))
+FAILURE_COOLDOWN_SECONDS = float(os.getenv("MODEL_FAILURE_COOLDOWN_SECONDS", "30"))
+CONSECUTIVE_FAILURES_FOR_COOLDOWN = 3
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("MODEL_REQUEST_TIMEOUT_SECONDS", "120"))
+
+
+class ModelRouterError(Exception):
+    """Raised when every candidate model failed (or none is configured) for a request."""
+
+
+class ModelStats:
+    def __init__(self, window: int = STATS_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record(self, latency: float, ok: Optional[bool]):
+        """`ok=None` records a latency lower bound only (request cancelled after a hedge won)."""
+        self.latencies.append(latency)
+        if ok is None:
+            return
+        self.outcomes.append(ok)
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= CONSECUTIVE_FAILURES_FOR_COOLDOWN:
+                self.cooldown_until = time.monotonic() + FAILURE_COOLDOWN_SECONDS
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    @property
+    def error_rate(self) -> float:
+        return (self.outcomes.count(False) / len(self.outcomes)) if self.outcomes else 0.0
+
+    @property
+    def healthy(self) -> bool:
+        if time.monotonic() < self.cooldown_until:
+            return False
+        return len(self.outcomes) < MIN_SAMPLES or self.error_rate < MAX_ERROR_RATE
+
+    def snapshot(self) -> dict:
+        return {
+            "samples": len(self.latencies),
+            "p50_ms": round(statistics.median(self.latencies) * 1000, 1) if self.latencies else None,
+            "p95_ms": round(self.percentile(0.95) * 1000, 1) if self.percentile(0.95) is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "healthy": self.healthy,
+        }
+
+
+@dataclass
+class ModelSpec:
+    name: str
+    provider: str
+    tier: int
+    call: Callable[[str, Any, bool], Awaitable[str]] # (model_name, prompt, json_mode) -> text
+    expected_latency: float = 2.0 # 통계가 쌓이기 전 사용하는 추정 지연 (초)
+    enabled: bool = True
+    stats: ModelStats = field(default_factory=ModelStats)
+
+    def estimated_latency(self) -> float:
+        p50 = self.stats.percentile(0.5)
+        return p50 if p50 is not None else self.expected_latency
+
+    def hedge_delay(self) -> float:
+        p95 = self.stats.percentile(0.95)
+        return p95 if p95 is not None else self.expected_latency * 2
+
+
+class ModelRouter:
+    def __init__(self, models: list[ModelSpec], hedging: bool = True, timeout: float = REQUEST_TIMEOUT_SECONDS):
+        self.models = models
+        self.hedging = hedging
+        self.timeout = timeout
+
+    def candidates(self, tier: int, preferred: Optional[str] = None) -> list[ModelSpec]:
+        eligible = [m for m in self.models if m.enabled and m.tier >= tier]
+        # 정상 모델 우선 -> 추정 지연이 짧은 순 -> 동률이면 원래 지정된 모델 우선
+        return sorted(eligible, key=lambda m: (not m.stats.healthy, m.estimated_latency(), m.name != preferred))
+
+    async def _run(self, spec: ModelSpec, prompt: Any, json_mode: bool) -> str:
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(spec.call(spec.name, prompt, json_mode), timeout=self.timeout)
+        except asyncio.CancelledError:
+            spec.stats.record(time.perf_counter() - started, ok=None)
+            record_span("llm", spec.name, started, status="cancelled")
+            raise
+        except Exception as e:
+            spec.stats.record(time.perf_counter() - started, ok=False)
+            record_span("llm", spec.name, started, status="error", error=repr(e))
+            raise
+        spec.stats.record(time.perf_counter() - started, ok=True)
+        record_span("llm", spec.name, started, status="ok")
+        return result
+
+    async def generate(self, tier: int, prompt: Any, json_mode: bool = False, preferred: Optional[str] = None) -> tuple[str, str]:
+        """Return (model_name, text) from the first candidate that succeeds."""
+        queue = self.candidates(tier, preferred)
+        if not queue:
+            raise ModelRouterError("No model is configured for this task.")
+
+        pending: dict[asyncio.Task, ModelSpec] = {}
+        errors = []
+        hedged = False
+        hedge_at = None
+
+        def launch():
+            nonlocal hedge_at
+            spec = queue.pop(0)
+            pending[asyncio.create_task(self._run(spec, prompt, json_mode))] = spec
+            hedge_at = time.monotonic() + spec.hedge_delay()
+
+        launch()
+        try:
+            while pending:
+                wait_timeout = None
+                if self.hedging and not hedged and queue:
+                    wait_timeout = max(0.0, hedge_at - time.monotonic())
+                done, _ = await asyncio.wait(pending, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # 첫 요청이 p95 를 넘김 -> 다음 후보에게 hedge 요청
+                    hedged = True
+                    launch()
+                    continue
+
+                for task in done:
+                    spec = pending.pop(task)
+                    if task.exception() is None:
+                        return spec.name, task.result()
+                    errors.append(f"{spec.name}: {task.exception()!r}")
+
+                if not pending and queue:
+                    launch() # fallback
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise ModelRouterError("All models failed - " + "; ".join(errors))
+
+    def snapshot(self) -> dict:
+        return {
+            m.name: {"provider": m.provider, "tier": m.tier, "enabled": m.enabled, **m.stats.snapshot()}
+            for m in self.models
+        }
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Float, Boolean, ForeignKey, LargeBinary
+from sqlalchemy.dialects.mysql import LONGBLOB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -27,6 +28,9 @@ class ChatRoom(Base):
     messages = relationship("Message", back_populates="chat_room", cascade="all, delete-orphan")
     report_context = relationship("ReportContext", uselist=False, back_populates="chat_room", cascade="all, delete-orphan")
     reports = relationship("Report", back_populates="chat_room", cascade="all, delete-orphan")
+    message_archive = relationship("MessageArchive", uselist=False, back_populates="chat_room", cascade="all, delete-orphan")
+    # 클러스터 통계까지 맞추려면 삭제 전에 blocker_index.remove_room 을 호출할 것
+    blocker_fragments = relationship("BlockerFragment", back_populates="chat_room", cascade="all, delete-orphan")
 
 
 class Message(Base):
@@ -45,7 +49,7 @@ class Report(Base):
     __tablename__ = "Reports"
 
     report_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    room_id = Column(Integer, ForeignKey("ChatRooms.room_id"), nullable=False)
+    room_id = Column(Integer, ForeignKey("ChatRooms.room_id"), unique=True, nullable=False) # 대화방당 리포트 1개
     summary_content = Column(Text, nullable=False) # Markdown summary
     created_at = Column(DateTime, default=func.now())
 
@@ -65,4 +69,67 @@ class ReportContext(Base):
 
     last_updated = Column(DateTime, default=func.now(), onupdate=func.now())
 
-    chat_room = relationship("ChatRoom", back_populates="report_context")
\ No newline at end of file
+    chat_room = relationship("ChatRoom", back_populates="report_context")
+
+
+class MessageArchive(Base):
+    __tablename__ = "MessageArchives"
+
+    # 리포트가 생성된 오래된 대화방의 메시지를 방 단위로 압축 보관 (archive.py 참고)
+    archive_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    room_id = Column(Integer, ForeignKey("ChatRooms.room_id"), unique=True, nullable=False)
+    message_count = Column(Integer, nullable=False, default=0)
+    payload = Column(LargeBinary().with_variant(LONGBLOB, "mysql"), nullable=False) # zlib-compressed JSON
+    archived_at = Column(DateTime, default=func.now())
+
+    chat_room = relationship("ChatRoom", back_populates="message_archive")
+
+
+class MemberMood(Base):
+    __tablename__ = "MemberMoods"
+
+    # mood_analytics.py 가 계산해서 저장하는 팀원별 컨디션 지표 (대시보드는 이 테이블만 읽음)
+    user_id = Column(Integer, ForeignKey("Users.user_id"), primary_key=True)
+    team_id = Column(Integer, nullable=True, index=True)
+    last_day = Column(Date, nullable=True) # 마지막으로 컨디션이 기록된 날
+    last_condition = Column(Text, nullable=True) # 원본 컨디션 텍스트
+    latest_score = Column(Float, nullable=True) # -1.0 (부정) ~ 1.0 (긍정)
+    rolling_score = Column(Float, nullable=True) # 최근 N일 평균
+    trend = Column(Float, nullable=True) # 최근 추세 (하루당 점수 변화량)
+    z_score = Column(Float, nullable=True) # 개인 기준선 대비 편차
+    is_anomaly = Column(Boolean, default=False, nullable=False)
+    blocker_count = Column(Integer, default=0, nullable=False) # 최근 N일 블로커 건수
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class BlockerCluster(Base):
+    __tablename__ = "BlockerClusters"
+
+    # blocker_index.py 가 팀별로 유사한 블로커 문장을 묶은 클러스터
+    cluster_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    team_id = Column(Integer, nullable=True, index=True)
+    label = Column(Text, nullable=False) # 대표 문장 (클러스터의 첫 문장)
+    centroid = Column(LargeBinary, nullable=False) # hashed char n-gram 벡터 합 (압축된 sparse)
+    fragment_count = Column(Integer, default=0, nullable=False) # 블로커가 나온 대화방 수
+    member_count = Column(Integer, default=0, nullable=False) # 서로 다른 팀원 수
+    day_count = Column(Integer, default=0, nullable=False) # 서로 다른 날짜 수
+    first_seen = Column(DateTime, nullable=True)
+    last_seen = Column(DateTime, nullable=True, index=True)
+
+    fragments = relationship("BlockerFragment", back_populates="cluster", cascade="all, delete-orphan")
+
+
+class BlockerFragment(Base):
+    __tablename__ = "BlockerFragments"
+
+    fragment_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    cluster_id = Column(Integer, ForeignKey("BlockerClusters.cluster_id"), nullable=False, index=True)
+    team_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=False)
+    room_id = Column(Integer, ForeignKey("ChatRooms.room_id"), nullable=False, index=True)
+    source = Column(String(20), nullable=False) # 'report' (리포트 "이슈 및 블로커" 섹션) or 'context' (섹션이 없을 때 ReportContext.blockers)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=True)
+
+    cluster = relationship("BlockerCluster", back_populates="fragments")
+    chat_room = relationship("ChatRoom", back_populates="blocker_fragments")
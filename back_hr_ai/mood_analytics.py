@@ -0,0 +1,302 @@
+"""
+팀 컨디션/분위기 분석.
+
+ReportContext.condition / blockers 이력을 로컬 어휘 사전으로 점수화해서
+(사용자 x 일자) 행렬로 만든 뒤 NumPy 로 이동 평균, 추세, 이상치(개인 기준선 대비 z-score)를 계산하고
+결과를 MemberMoods 테이블에 저장한다. 대시보드는 MemberMoods 만 읽으므로 팀 규모에 비례한 비용만 든다.
+
+이동 평균/블로커 수는 계산한 날 기준 창이므로, 채팅이 없는 팀원의 값도 낡지 않도록
+팀 조회 시 MOOD_STALE_HOURS 보다 오래된 행이 있으면 응답 이후 팀 전체를 재계산한다.
+
+Usage:
+    python mood_analytics.py            # 전체 팀 재계산 (야간 배치 용도)
+    python mood_analytics.py --team 3
+"""
+import os
+import datetime
+import argparse
+import threading
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import User, ChatRoom, ReportContext, MemberMood
+
+DEFAULT_VALUE = "내용 없음"
+
+HISTORY_DAYS = int(os.getenv("MOOD_HISTORY_DAYS", "180"))
+ROLLING_DAYS = int(os.getenv("MOOD_ROLLING_DAYS", "7"))
+BASELINE_DAYS = int(os.getenv("MOOD_BASELINE_DAYS", "28"))
+TREND_DAYS = 14
+MIN_BASELINE_SAMPLES = 5
+SIGMA_FLOOR = 0.15 # 기준선이 거의 일정한 사람에게 작은 변화로 이상치가 뜨지 않도록
+Z_THRESHOLD = float(os.getenv("MOOD_Z_THRESHOLD", "2.0"))
+MOOD_STALE_HOURS = float(os.getenv("MOOD_STALE_HOURS", "6"))
+
+# 같은 사용자를 동시에 재계산하면 MemberMoods 행을 두 번 INSERT 하므로 프로세스 내에서 직렬화
+_refresh_lock = threading.Lock()
+_pending_teams: set[int] = set()
+
+# 부분 문자열 매칭이라 어간 위주로 작성. "안 좋" 은 "좋"(+1.0) 과 합쳐져서 -0.6 이 된다.
+LEXICON = {
+    "좋": 1.0, "행복": 1.0, "뿌듯": 1.0, "신나": 1.0, "의욕": 0.8, "만족": 0.8, "상쾌": 0.8,
+    "괜찮": 0.5, "여유": 0.5, "무난": 0.3,
+    "안 좋": -1.6, "안좋": -1.6, "나쁨": -0.8, "나빠": -0.8, "별로": -0.4, "멍": -0.3, "야근": -0.5,
+    "피곤": -0.6, "아프": -0.7, "지침": -0.8, "지쳤": -0.8, "힘들": -0.8, "불안": -0.8, "짜증": -0.9,
+    "스트레스": -1.0, "화가": -1.0, "화나": -1.0, "빡치": -1.0, "우울": -1.0, "때려치": -1.0,
+}
+
+
+def score_conditions(texts: np.ndarray) -> np.ndarray:
+    """Lexicon score in [-1, 1] per condition text; NaN when nothing was recorded."""
+    raw = np.zeros(len(texts))
+    for term, weight in LEXICON.items():
+        raw += weight * np.char.count(texts, term)
+    scores = np.tanh(raw)
+    scores[(texts == DEFAULT_VALUE) | (texts == "")] = np.nan
+    return scores
+
+
+def count_blockers(texts: np.ndarray) -> np.ndarray:
+    counts = np.char.count(texts, "\n") + 1
+    counts[(texts == DEFAULT_VALUE) | (texts == "")] = 0
+    return counts
+
+
+def _rolling_sum(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sum along the day axis (window includes the current day)."""
+    cs = np.cumsum(matrix, axis=1)
+    out = cs.copy()
+    out[:, window:] = cs[:, window:] - cs[:, :-window]
+    return out
+
+
+def _shift_right(matrix: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(matrix)
+    out[:, 1:] = matrix[:, :-1]
+    return out
+
+
+def compute_member_moods(user_ids: np.ndarray, day_offsets: np.ndarray, conditions: np.ndarray,
+                         blockers: np.ndarray, members: np.ndarray, n_days: int = HISTORY_DAYS) -> dict:
+    """
+    Vectorized per-member signals over the last `n_days` days.
+
+    Inputs are columnar arrays (one element per ReportContext) sorted by time;
+    `day_offsets` is 0 for the first day of the window and n_days - 1 for today.
+    Returns a dict of arrays aligned with `members`.
+    """
+    n_users = len(members)
+    member_index = {int(u): i for i, u in enumerate(members)}
+    rows = np.array([member_index[int(u)] for u in user_ids], dtype=np.int64)
+    flat = rows * n_days + day_offsets
+    size = n_users * n_days
+
+    scores = score_conditions(conditions)
+    valid = ~np.isnan(scores)
+
+    score_sum = np.bincount(flat[valid], weights=scores[valid], minlength=size).reshape(n_users, n_days)
+    score_cnt = np.bincount(flat[valid], minlength=size).reshape(n_users, n_days).astype(float)
+    blocker_daily = np.bincount(flat, weights=count_blockers(blockers), minlength=size).reshape(n_users, n_days)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        daily = np.where(score_cnt > 0, score_sum / score_cnt, np.nan)
+        has_day = ~np.isnan(daily)
+        filled = np.nan_to_num(daily)
+
+        # 최근 ROLLING_DAYS 평균 (오늘 기준)
+        rolling_sum = _rolling_sum(filled, ROLLING_DAYS)
+        rolling_cnt = _rolling_sum(has_day.astype(float), ROLLING_DAYS)
+        rolling = np.where(rolling_cnt > 0, rolling_sum / rolling_cnt, np.nan)
+
+        # 각 사용자의 마지막 기록일과 그 이전 BASELINE_DAYS 기준선
+        any_day = has_day.any(axis=1)
+        last = n_days - 1 - np.argmax(has_day[:, ::-1], axis=1)
+        idx = np.arange(n_users)
+        latest = np.where(any_day, daily[idx, last], np.nan)
+
+        base_sum = _shift_right(_rolling_sum(filled, BASELINE_DAYS))[idx, last]
+        base_sq = _shift_right(_rolling_sum(filled ** 2, BASELINE_DAYS))[idx, last]
+        base_cnt = _shift_right(_rolling_sum(has_day.astype(float), BASELINE_DAYS))[idx, last]
+        mu = base_sum / base_cnt
+        sigma = np.maximum(np.sqrt(np.maximum(base_sq / base_cnt - mu ** 2, 0.0)), SIGMA_FLOOR)
+        z = np.where(any_day & (base_cnt >= MIN_BASELINE_SAMPLES), (latest - mu) / sigma, np.nan)
+
+        # 최근 TREND_DAYS 일별 점수의 최소제곱 기울기
+        y = daily[:, -TREND_DAYS:]
+        m = ~np.isnan(y)
+        y0 = np.nan_to_num(y)
+        t = np.arange(y.shape[1], dtype=float)
+        n = m.sum(axis=1)
+        t_bar = (t * m).sum(axis=1) / n
+        y_bar = y0.sum(axis=1) / n
+        dt = (t - t_bar[:, None]) * m
+        var_t = (dt ** 2).sum(axis=1)
+        trend = np.where((n >= 2) & (var_t > 0), (dt * (y0 - y_bar[:, None])).sum(axis=1) / var_t, np.nan)
+
+    return {
+        "last_offset": np.where(any_day, last, -1),
+        "latest_score": latest,
+        "rolling_score": rolling[:, -1],
+        "trend": trend,
+        "z_score": z,
+        "is_anomaly": np.nan_to_num(np.abs(z)) >= Z_THRESHOLD,
+        "blocker_count": _rolling_sum(blocker_daily, ROLLING_DAYS)[:, -1].astype(int),
+    }
+
+
+def _opt_float(value) -> float | None:
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def refresh_member_moods(db: Session, user_ids: list[int] | None = None, team_id: int | None = None) -> int:
+    """Recompute and materialize MemberMoods for the given users, a team, or everyone."""
+    with _refresh_lock:
+        try:
+            return _refresh_member_moods(db, user_ids, team_id)
+        except IntegrityError:
+            # 다른 워커가 같은 사용자의 행을 먼저 만든 경우 - 이번에는 기존 행을 갱신
+            db.rollback()
+            return _refresh_member_moods(db, user_ids, team_id)
+
+
+def _refresh_member_moods(db: Session, user_ids: list[int] | None, team_id: int | None) -> int:
+    user_query = db.query(User.user_id, User.team_id)
+    if user_ids is not None:
+        user_query = user_query.filter(User.user_id.in_(user_ids))
+    if team_id is not None:
+        user_query = user_query.filter(User.team_id == team_id)
+    users = user_query.order_by(User.user_id).all()
+    if not users:
+        return 0
+    members = np.array([u.user_id for u in users], dtype=np.int64)
+
+    today = datetime.date.today()
+    start = today - datetime.timedelta(days=HISTORY_DAYS - 1)
+    rows = (
+        db.query(ChatRoom.user_id, ChatRoom.created_at, ReportContext.condition, ReportContext.blockers)
+        .join(ReportContext, ReportContext.room_id == ChatRoom.room_id)
+        .filter(ChatRoom.user_id.in_(members.tolist()))
+        .filter(ChatRoom.created_at >= datetime.datetime.combine(start, datetime.time.min))
+        .order_by(ChatRoom.created_at)
+        .all()
+    )
+
+    user_col = np.array([r.user_id for r in rows], dtype=np.int64)
+    day_col = np.array([(r.created_at.date() - start).days for r in rows], dtype=np.int64)
+    day_col = np.clip(day_col, 0, HISTORY_DAYS - 1)
+    condition_col = np.array([r.condition or "" for r in rows], dtype=str)
+    blocker_col = np.array([r.blockers or "" for r in rows], dtype=str)
+
+    if rows:
+        result = compute_member_moods(user_col, day_col, condition_col, blocker_col, members)
+    else:
+        nan = np.full(len(members), np.nan)
+        result = {"last_offset": np.full(len(members), -1), "latest_score": nan, "rolling_score": nan,
+                  "trend": nan, "z_score": nan, "is_anomaly": np.zeros(len(members), dtype=bool),
+                  "blocker_count": np.zeros(len(members), dtype=int)}
+
+    # 사용자별 마지막 원본 컨디션 텍스트 (rows 는 시간순 정렬이므로 역순 첫 등장 = 최신)
+    last_condition = {}
+    if rows:
+        recorded = (condition_col != DEFAULT_VALUE) & (condition_col != "")
+        rev_users = user_col[recorded][::-1]
+        rev_texts = condition_col[recorded][::-1]
+        uniq, first = np.unique(rev_users, return_index=True)
+        last_condition = {int(u): str(rev_texts[i]) for u, i in zip(uniq, first)}
+
+    computed_at = datetime.datetime.now()
+    existing = {m.user_id: m for m in db.query(MemberMood).filter(MemberMood.user_id.in_(members.tolist())).all()}
+    for i, user in enumerate(users):
+        mood = existing.get(user.user_id)
+        if mood is None:
+            mood = MemberMood(user_id=user.user_id)
+            db.add(mood)
+        offset = int(result["last_offset"][i])
+        mood.team_id = user.team_id
+        mood.last_day = start + datetime.timedelta(days=offset) if offset >= 0 else None
+        mood.last_condition = last_condition.get(user.user_id)
+        mood.latest_score = _opt_float(result["latest_score"][i])
+        mood.rolling_score = _opt_float(result["rolling_score"][i])
+        mood.trend = _opt_float(result["trend"][i])
+        mood.z_score = _opt_float(result["z_score"][i])
+        mood.is_anomaly = bool(result["is_anomaly"][i])
+        mood.blocker_count = int(result["blocker_count"][i])
+        mood.updated_at = computed_at # needs_refresh 가 파이썬 시각과 비교하므로 DB now() 대신 명시
+    db.commit()
+    return len(users)
+
+
+def refresh_users_task(user_ids: list[int]):
+    """BackgroundTasks entry point - uses its own session since the request session is closed."""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        refresh_member_moods(db, user_ids=user_ids)
+    except Exception as e:
+        db.rollback()
+        print(f"[ERROR] Failed to refresh member moods for {user_ids}: {e}")
+    finally:
+        db.close()
+
+
+def refresh_team_task(team_id: int):
+    """BackgroundTasks entry point for a stale team; skipped when a refresh for the team is already queued."""
+    from database import SessionLocal
+
+    if team_id in _pending_teams:
+        return
+    _pending_teams.add(team_id)
+    db = SessionLocal()
+    try:
+        refresh_member_moods(db, team_id=team_id)
+    except Exception as e:
+        db.rollback()
+        print(f"[ERROR] Failed to refresh member moods for team {team_id}: {e}")
+    finally:
+        _pending_teams.discard(team_id)
+        db.close()
+
+
+def needs_refresh(moods: list[MemberMood], member_count: int) -> bool:
+    """True when a member has no materialized row or one computed more than MOOD_STALE_HOURS ago."""
+    if len(moods) < member_count:
+        return True
+    cutoff = datetime.datetime.now() - datetime.timedelta(hours=MOOD_STALE_HOURS)
+    return any(m.updated_at is None or m.updated_at < cutoff for m in moods)
+
+
+def team_mood_summary(db: Session, team_id: int) -> dict:
+    """Read materialized moods for one team and aggregate them (O(team size))."""
+    moods = db.query(MemberMood).filter(MemberMood.team_id == team_id).all()
+    rolling = [m.rolling_score for m in moods if m.rolling_score is not None]
+    trends = [m.trend for m in moods if m.trend is not None]
+    computed = [m.updated_at for m in moods if m.updated_at is not None]
+    return {
+        "team_id": team_id,
+        "updated_at": min(computed) if computed else None, # 가장 오래된 계산 시각 (데이터 나이)
+        "member_count": len(moods),
+        "avg_rolling_score": round(sum(rolling) / len(rolling), 4) if rolling else None,
+        "avg_trend": round(sum(trends) / len(trends), 4) if trends else None,
+        "anomaly_count": sum(1 for m in moods if m.is_anomaly),
+        "blocker_count": sum(m.blocker_count for m in moods),
+        "members": moods,
+    }
+
+
+if __name__ == "__main__":
+    from database import Base, engine, SessionLocal
+
+    parser = argparse.ArgumentParser(description="Recompute materialized team mood analytics.")
+    parser.add_argument("--team", type=int, default=None, help="only recompute this team")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = refresh_member_moods(db, team_id=args.team)
+        print(f"Refreshed mood analytics for {count} users.")
+    finally:
+        db.close()
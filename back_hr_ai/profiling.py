@@ -0,0 +1,167 @@
+"""
+요청 단위 on-demand 프로파일링.
+
+관리자가 X-Profile: 1 헤더를 보내거나 PROFILE_SAMPLE_RATE 비율로 샘플링된 요청에 대해
+- pyinstrument 샘플링 프로파일 (설치되어 있을 때만)
+- 요청 처리 중 실행된 SQL 문과 LLM 호출의 타임라인
+을 기록해서 PROFILE_DIR 에 저장한다. 관리자 API 로 목록 조회/다운로드 가능 (main.py).
+
+NOTE: pyinstrument 는 시작한 스레드만 샘플링하므로 sync 엔드포인트(팀 조회 등)는
+스레드풀에서 실행되는 부분이 프로파일에 잘 안 잡힌다. 이 경우 SQL 타임라인을 보면 된다.
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import uuid
+import random
+import datetime
+import contextvars
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from pyinstrument import Profiler
+except ImportError: # optional dependency
+    Profiler = None
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+MAX_STATEMENT_LENGTH = 2000
+
+# intelligent_chat, generate_report, 팀 엔드포인트
+# 팀 리포트 export 는 StreamingResponse 라서 본문을 읽기 전에 프로파일이 끝나므로 제외
+PROFILED_PATHS = [
+    ("POST", re.compile(r"^/api/v1/chat_rooms/\d+/messages$")),
+    ("POST", re.compile(r"^/api/v1/chat_rooms/\d+/reports$")),
+    ("GET", re.compile(r"^/api/v1/team(?!/reports/export$)(/.*)?$")),
+]
+
+_PROFILE_ID_RE = re.compile(r"^[0-9A-Za-z_-]+$")
+
+_current_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar("profile_session", default=None)
+
+
+class ProfileSession:
+    def __init__(self, method: str, path: str, reason: str):
+        self.profile_id = f"{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = datetime.datetime.now()
+        self.started = time.perf_counter()
+        self.events: list[dict] = []
+
+    def add_event(self, kind: str, name: str, started: float, ended: float, **extra):
+        self.events.append({
+            "type": kind,
+            "name": name,
+            "offset_ms": round((started - self.started) * 1000, 2),
+            "duration_ms": round((ended - started) * 1000, 2),
+            **extra,
+        })
+
+
+def is_profiled_path(method: str, path: str) -> bool:
+    return any(method == m and pattern.match(path) for m, pattern in PROFILED_PATHS)
+
+
+def sampled() -> bool:
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def record_span(kind: str, name: str, started: float, **extra):
+    """Append a timeline event to the active profile (no-op when the request is not profiled)."""
+    session = _current_session.get()
+    if session is not None:
+        session.add_event(kind, name, started, time.perf_counter(), **extra)
+
+
+# --- SQL timeline (all engines) ---
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_session.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("profile_query_start")
+    if starts:
+        record_span("sql", conn.engine.url.database or "", starts.pop(), statement=statement[:MAX_STATEMENT_LENGTH])
+
+
+@asynccontextmanager
+async def profile_request(method: str, path: str, reason: str):
+    session = ProfileSession(method, path, reason)
+    token = _current_session.set(session)
+    profiler = Profiler(async_mode="enabled") if Profiler is not None else None
+    if profiler is not None:
+        profiler.start()
+    try:
+        yield session
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        _current_session.reset(token)
+        total_ms = (time.perf_counter() - session.started) * 1000
+        # HTML 렌더링/파일 쓰기/정리는 스레드에서 실행해서 다른 요청을 막지 않음
+        await asyncio.to_thread(_save, session, profiler, total_ms)
+
+
+def _save(session: ProfileSession, profiler, total_ms: float):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    data = {
+        "profile_id": session.profile_id,
+        "method": session.method,
+        "path": session.path,
+        "reason": session.reason,
+        "started_at": session.started_at.isoformat(),
+        "duration_ms": round(total_ms, 2),
+        "sql_count": sum(1 for e in session.events if e["type"] == "sql"),
+        "sql_ms": round(sum(e["duration_ms"] for e in session.events if e["type"] == "sql"), 2),
+        "llm_count": sum(1 for e in session.events if e["type"] == "llm"),
+        "llm_ms": round(sum(e["duration_ms"] for e in session.events if e["type"] == "llm"), 2),
+        "timeline": session.events,
+        "profile_text": profiler.output_text(unicode=True) if profiler is not None else None,
+    }
+    with open(os.path.join(PROFILE_DIR, f"{session.profile_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    if profiler is not None:
+        with open(os.path.join(PROFILE_DIR, f"{session.profile_id}.html"), "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+    _prune()
+
+
+def _prune():
+    ids = sorted({name.rsplit(".", 1)[0] for name in os.listdir(PROFILE_DIR)})
+    for profile_id in ids[:-PROFILE_MAX_FILES] if len(ids) > PROFILE_MAX_FILES else []:
+        for ext in ("json", "html"):
+            path = os.path.join(PROFILE_DIR, f"{profile_id}.{ext}")
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def list_profiles() -> list[dict]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(PROFILE_DIR, name), encoding="utf-8") as f:
+            data = json.load(f)
+        profiles.append({k: data[k] for k in ("profile_id", "method", "path", "reason", "started_at", "duration_ms", "sql_count", "sql_ms", "llm_count", "llm_ms")})
+    return profiles
+
+
+def profile_path(profile_id: str, fmt: str = "json") -> Optional[str]:
+    if fmt not in ("json", "html") or not _PROFILE_ID_RE.match(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.{fmt}")
+    return path if os.path.exists(path) else None
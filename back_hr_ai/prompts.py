@@ -0,0 +1,164 @@
+"""
+프롬프트 템플릿.
+
+모든 프롬프트는 [고정 prefix] + [요청마다 바뀌는 suffix] 구조로 만든다.
+prefix 가 매번 바이트 단위로 동일해야 OpenAI prompt caching / Gemini (implicit, context) caching 이
+적용되므로, 요약 상태·대화 기록·사용자 메시지 같은 per-turn 데이터는 반드시 suffix 에만 넣는다.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Prompt:
+    template: str
+    cache_key: str
+    prefix: str
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    prefix: str
+    suffix_template: str
+
+    @property
+    def cache_key(self) -> str:
+        # prefix 내용이 바뀌면 키도 바뀌어서 이전 캐시를 재사용하지 않음
+        return f"hr-ai:{self.name}:{hashlib.sha256(self.prefix.encode('utf-8')).hexdigest()[:12]}"
+
+    def render(self, **values) -> Prompt:
+        return Prompt(self.name, self.cache_key, self.prefix, self.suffix_template.format(**values))
+
+
+class PromptCacheStats:
+    """Prompt tokens vs. provider-cached prompt tokens, per (template, model)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], dict] = {}
+
+    def record(self, template: str, model: str, prompt_tokens: int | None, cached_tokens: int | None):
+        with self._lock:
+            entry = self._entries.setdefault((template, model), {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0})
+            entry["requests"] += 1
+            entry["prompt_tokens"] += prompt_tokens or 0
+            entry["cached_tokens"] += cached_tokens or 0
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "template": template,
+                    "model": model,
+                    **entry,
+                    "uncached_tokens": entry["prompt_tokens"] - entry["cached_tokens"],
+                    "cache_hit_ratio": round(entry["cached_tokens"] / entry["prompt_tokens"], 3) if entry["prompt_tokens"] else 0.0,
+                }
+                for (template, model), entry in sorted(self._entries.items())
+            ]
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+TRIAGE_PROMPT = PromptTemplate(
+    name="triage",
+    prefix="""You are a message analysis expert. Your task is to analyze the user's message and respond in a structured JSON array format. Follow these rules precisely:
+
+1.  **SEGMENTATION**: If the user's message contains multiple distinct topics (e.g., condition, task, issue), you MUST break the single input message into these separate logical units.
+2.  **CATEGORIZATION**: For each segmented logical unit, you MUST identify ALL valid categories that the unit relates to. The valid categories are: "오늘 한 일", "이슈 및 블로커", "내일 할 일", "컨디션", "잡담".
+3.  **PROFANITY DETECTION**: For each segmented unit, you MUST analyze for any abusive, offensive, or profane language. Set the `profanity_detected` boolean flag to `true` if found, otherwise `false`.
+4.  **NEGATIVE/NON-COMMITTAL ANSWERS**: If the user provides a negative or non-committal answer (e.g., "없었어", "아니", "기억 안나", "별거 없어"), you MUST record the `content` for the relevant category as "내용 없음". Do not categorize it as "잡담".
+5.  **OUTPUT**: Respond ONLY in a JSON Array format. Each element must be a JSON object containing `category`, `content`, and `profanity_detected`.
+
+---
+**Example 1: Complex message**
+User Input: "프로젝트를 3번째 엎었어. 진짜 빡치네. 내일은 다시 시작해야지."
+Your Output:
+[
+  {
+    "category": "이슈 및 블로커",
+    "content": "프로젝트를 3번째 엎었어.",
+    "profanity_detected": true
+  },
+  {
+    "category": "컨디션",
+    "content": "프로젝트를 3번째 엎었어. 진짜 빡치네.",
+    "profanity_detected": true
+  },
+  {
+    "category": "내일 할 일",
+    "content": "내일은 다시 시작해야지.",
+    "profanity_detected": false
+  }
+]
+
+**Example 2: Negative answer**
+User Input: "오늘 뭐 딱히 한 거 없어."
+Your Output:
+[
+  {
+    "category": "오늘 한 일",
+    "content": "내용 없음",
+    "profanity_detected": false
+  }
+]
+---
+
+""",
+    suffix_template="""Current Summary Status:
+{current_summary_text}
+
+Conversation History (Last 10 messages):
+{conversation_history}
+
+User's latest message: "{user_message}"
+
+Your JSON Array Output:
+""",
+)
+
+CHAT_RESPONSE_PROMPT = PromptTemplate(
+    name="chat_response",
+    prefix="You are a friendly AI assistant. You MUST respond in Korean. Your goal is to gather information for a work report.\n\n",
+    suffix_template="{instruction}\n\nConversation History:\n{conversation_history}\n\nUser's last message: '{user_message}'",
+)
+
+REPORT_PROMPT = PromptTemplate(
+    name="report",
+    prefix="""You are an expert HR analyst and report writer. Your task is to synthesize the raw daily notes from a team member given at the end into a clear, concise, and insightful daily report.
+
+[Report Writing Instructions]
+1.  **Structure:** Organize the report into the following sections using markdown: "오늘 완료한 업무", "이슈 및 블로커", "내일 계획", "오늘의 컨디션".
+2.  **Synthesize and Refine:** Do not just copy-paste the raw data. Rephrase the points in a professional and easy-to-read manner. If the raw data is messy or contains multiple points, consolidate them into clear bullet points.
+3.  **Insightful Summary (Condition):** For the "오늘의 컨디션" section, don't just state the condition. Provide a brief, objective summary of the user's emotional state based on the provided data.
+4.  **Tone:** Maintain a neutral, professional, and supportive tone.
+Generate the report in Korean.
+
+""",
+    suffix_template="""[Raw Data from Daily Summary]
+- 오늘 한 일: {work_done}
+- 이슈 및 블로커: {blockers}
+- 내일 할 일: {tomorrow_plan}
+- 컨디션: {condition}
+""",
+)
+
+TITLE_PROMPT = PromptTemplate(
+    name="title",
+    prefix="""Based on the following daily report summary, generate a short, concise, and relevant title for this chat room (max 20 characters).
+The title should represent the main topic or the day's work.
+Do not use quotes or markdown. Just the title text.
+
+""",
+    suffix_template="""[Report Summary]
+{summary_content}
+""",
+)
@@ -0,0 +1,122 @@
+"""
+LLM 엔드포인트용 in-process single-flight / Idempotency-Key 처리.
+
+- SingleFlight: 같은 key 로 동시에 들어온 요청은 하나의 실행(LLM 호출 포함)을 공유한다.
+  Idempotency-Key 는 이 key 에 포함하지 않는다 - 클라이언트는 클릭마다 새 키를 보내므로
+  키별로 나누면 더블클릭이 그대로 두 번 실행된다.
+- IdempotencyCache: Idempotency-Key 헤더로 들어온 요청의 완료된 결과를 TTL 동안 보관해서
+  클라이언트 재시도 시 같은 응답을 돌려준다 (메시지 중복 저장 / 트리아지 중복 실행 방지).
+
+프로세스 단위 메모리 구조이므로 워커가 여러 개면 워커별로 동작한다.
+DB 레벨 보장은 Reports.room_id unique 제약이 담당한다.
+"""
+import os
+import time
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Optional
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an Idempotency-Key is reused for a request with a different body."""
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while (in_flight := self._calls.get(key)) is not None:
+            # asyncio.wait 는 follower 가 취소되어도 leader 의 future 를 취소하지 않고,
+            # leader 가 취소되어도 예외를 던지지 않는다 -> 그 경우 follower 중 하나가 새 leader 가 됨
+            await asyncio.wait([in_flight])
+            if not in_flight.cancelled():
+                return in_flight.result()
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception() # mark as retrieved when there are no followers
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+
+class IdempotencyCache:
+    def __init__(self, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[str, tuple[float, Any]] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return result
+
+    def set(self, key: str, result: Any):
+        now = time.monotonic()
+        # 만료된 항목 정리
+        for expired_key in [k for k, (expires_at, _) in self._entries.items() if expires_at < now]:
+            self._entries.pop(expired_key, None)
+        self._entries[key] = (now + self.ttl_seconds, result)
+
+
+single_flight = SingleFlight()
+idempotency_cache = IdempotencyCache()
+# 실행 중인 Idempotency-Key 요청의 body fingerprint (동시에 다른 body 로 재사용하는 경우 감지)
+_in_flight_fingerprints: dict[str, Optional[str]] = {}
+
+
+def content_key(*parts: str) -> str:
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+async def run_idempotent(key: str, fn: Callable[[], Awaitable[Any]], idempotency_key: Optional[str] = None,
+                         fingerprint: Optional[str] = None) -> Any:
+    """
+    Run `fn` once per `key` among concurrent callers; with an Idempotency-Key, replay the finished result.
+
+    `key` should already be scoped to the caller (e.g. room owner) and is shared by concurrent requests whatever
+    Idempotency-Key they send. `fingerprint` identifies the request body; reusing an Idempotency-Key with a
+    different fingerprint raises IdempotencyConflict instead of replaying.
+    """
+    if not idempotency_key:
+        return await single_flight.do(key, fn)
+
+    cache_key = f"{key}:idem:{idempotency_key}"
+    cached = idempotency_cache.get(cache_key)
+    if cached is not None:
+        cached_fingerprint, result = cached
+        if cached_fingerprint != fingerprint:
+            raise IdempotencyConflict(idempotency_key)
+        return result
+
+    if cache_key in _in_flight_fingerprints:
+        if _in_flight_fingerprints[cache_key] != fingerprint:
+            raise IdempotencyConflict(idempotency_key)
+        return await single_flight.do(key, fn)
+
+    _in_flight_fingerprints[cache_key] = fingerprint
+    try:
+        result = await single_flight.do(key, fn)
+    finally:
+        _in_flight_fingerprints.pop(cache_key, None)
+
+    idempotency_cache.set(cache_key, (fingerprint, result))
+    return result
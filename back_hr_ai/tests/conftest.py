@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# database.py 는 import 시점에 엔진을 만들기 때문에 테스트 모듈이 import 되기 전에 설정해야 함.
+# primary / replica 역할을 하는 SQLite 파일 두 개를 사용한다.
+_tmp_dir = tempfile.mkdtemp(prefix="hr_ai_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'primary.db')}"
+os.environ["DATABASE_REPLICA_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'replica.db')}"
+os.environ.setdefault("PROFILE_DIR", os.path.join(_tmp_dir, "profiles"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
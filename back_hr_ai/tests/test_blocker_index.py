@@ -0,0 +1,116 @@
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import database
+import main
+from database import Base
+from models import User, ChatRoom, Report, ReportContext, BlockerCluster, BlockerFragment
+from blocker_index import index_room, remove_room, top_recurring_blockers
+
+BLOCKER = "배포 서버 권한이 없어서 테스트를 못 했음"
+REPORT = f"""## 오늘 한 일
+- API 문서 작성
+
+## 이슈 및 블로커
+- {BLOCKER}
+
+## 내일 할 일
+- 배포
+"""
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'blockers.db'}")
+
+    # InnoDB 처럼 외래 키 제약을 검사
+    @event.listens_for(engine, "connect")
+    def _enable_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _reported_room(db, user, blockers=BLOCKER, summary=REPORT):
+    room = ChatRoom(user_id=user.user_id, title="업무 보고")
+    db.add(room)
+    db.flush()
+    db.add(ReportContext(room_id=room.room_id, blockers=blockers))
+    db.add(Report(room_id=room.room_id, summary_content=summary))
+    db.commit()
+    return room
+
+
+def _user(db, username):
+    user = User(username=username, hashed_password="x", name=username, team_id=1, role="팀원")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_room_is_indexed_from_one_source(db):
+    user = _user(db, "user")
+    room = _reported_room(db, user)
+
+    assert index_room(db, room.room_id) == 1
+    [blocker] = top_recurring_blockers(db, team_id=1)
+    assert blocker["fragment_count"] == 1
+    assert [e["content"] for e in blocker["examples"]] == [BLOCKER]
+    assert db.query(BlockerFragment.source).scalar() == "report"
+
+
+def test_context_is_used_when_report_has_no_blocker_section(db):
+    user = _user(db, "user")
+    room = _reported_room(db, user, summary="## 오늘 한 일\n- API 문서 작성\n")
+
+    assert index_room(db, room.room_id) == 1
+    assert db.query(BlockerFragment.source).scalar() == "context"
+
+
+def test_cluster_counts_rooms_not_fragments(db):
+    user = _user(db, "user")
+    summary = REPORT.replace(f"- {BLOCKER}", f"- {BLOCKER}\n- {BLOCKER}.")
+    room = _reported_room(db, user, summary=summary)
+    index_room(db, room.room_id)
+
+    cluster = db.query(BlockerCluster).one()
+    assert db.query(BlockerFragment).count() == 2
+    assert cluster.fragment_count == 1
+
+
+def test_orm_delete_of_indexed_room(db):
+    first, second = _user(db, "first"), _user(db, "second")
+    rooms = [_reported_room(db, first), _reported_room(db, second)]
+    for room in rooms:
+        index_room(db, room.room_id)
+    assert db.query(BlockerCluster).one().member_count == 2
+
+    remove_room(db, rooms[0].room_id)
+    db.delete(rooms[0])
+    db.commit()
+    cluster = db.query(BlockerCluster).one()
+    assert (cluster.fragment_count, cluster.member_count) == (1, 1)
+
+    # remove_room 없이 삭제해도 cascade 로 외래 키 오류 없이 지워짐
+    db.delete(rooms[1])
+    db.commit()
+    assert db.query(BlockerFragment).count() == 0
+
+
+@pytest.mark.parametrize("params", [{"limit": 0}, {"limit": -1}, {"limit": 51}, {"days": 0}])
+def test_blockers_endpoint_rejects_out_of_range_params(params):
+    with TestClient(main.app) as client:
+        # 로그인은 replica 에서 읽으므로 primary 를 복사 (복제 따라잡음)
+        shutil.copy(database.engine.url.database, database.replica_engine.url.database)
+        token = client.post("/api/v1/login", data={"username": "leader", "password": "password"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/api/v1/team/blockers", params=params, headers=headers).status_code == 422
+        assert client.get("/api/v1/team/blockers", params={"limit": 50, "days": 1}, headers=headers).status_code == 200
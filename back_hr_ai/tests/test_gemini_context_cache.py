@@ -0,0 +1,60 @@
+import asyncio
+import datetime
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+import main
+from prompts import TITLE_PROMPT
+
+
+class FakeCreate:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return object()
+
+
+@pytest.fixture
+def fake_create(monkeypatch):
+    monkeypatch.setattr(main, "_gemini_context_caches", {})
+    monkeypatch.setattr(main.genai.GenerativeModel, "from_cached_content", classmethod(lambda cls, cached_content, generation_config: "cached-model"))
+
+    def install(*errors):
+        create = FakeCreate(*errors)
+        monkeypatch.setattr(main.genai.caching.CachedContent, "create", create)
+        return create
+    return install
+
+
+def _cached_model():
+    prompt = TITLE_PROMPT.render(summary_content="- API 문서 작성")
+    return asyncio.run(main._gemini_cached_model("gemini-test", prompt, None))
+
+
+def test_transient_error_is_retried_after_backoff(fake_create):
+    create = fake_create(google_exceptions.ServiceUnavailable("503"))
+
+    assert _cached_model() is None
+    assert _cached_model() is None # 재시도 대기 중에는 다시 만들지 않음
+    assert create.calls == 1
+
+    # 재시도 대기 시간이 지남
+    for key, (cached, _) in list(main._gemini_context_caches.items()):
+        main._gemini_context_caches[key] = (cached, datetime.datetime.now() - datetime.timedelta(seconds=1))
+    assert _cached_model() == "cached-model"
+    assert create.calls == 2
+
+
+def test_unsupported_prefix_disables_caching(fake_create, monkeypatch):
+    monkeypatch.setattr(main, "GEMINI_CONTEXT_CACHE_RETRY_SECONDS", 0)
+    create = fake_create(google_exceptions.InvalidArgument("Cached content is too small"))
+
+    assert _cached_model() is None
+    assert _cached_model() is None
+    assert create.calls == 1
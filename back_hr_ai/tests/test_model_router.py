@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import pytest
+
+import model_router
+from model_router import ModelRouter, ModelSpec, ModelRouterError, TIER_FAST, TIER_HIGH
+
+
+class StubProvider:
+    """Async stand-in for a provider call that injects a delay and/or failure."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = False
+
+    async def __call__(self, model_name, prompt, json_mode):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise RuntimeError(f"{model_name} failed")
+        return f"{model_name}:{prompt}"
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_slow_primary_is_hedged_and_fast_secondary_wins():
+    slow, fast = StubProvider(delay=1.0), StubProvider(delay=0.01)
+    router = ModelRouter([
+        ModelSpec("primary", "gemini", TIER_FAST, slow, expected_latency=0.02),
+        ModelSpec("secondary", "openai", TIER_FAST, fast, expected_latency=0.05),
+    ])
+
+    async def scenario():
+        started = time.perf_counter()
+        result = await router.generate(TIER_FAST, "hi")
+        return result, time.perf_counter() - started
+
+    (model_name, text), elapsed = _run(scenario())
+    assert model_name == "secondary"
+    assert text == "secondary:hi"
+    assert slow.calls == 1 and fast.calls == 1
+    # hedge 는 primary 의 추정 p95 (expected_latency * 2) 이후에 나가고, primary 를 끝까지 기다리지 않음
+    assert elapsed < 0.5
+
+
+def test_losing_request_is_cancelled():
+    slow, fast = StubProvider(delay=1.0), StubProvider(delay=0.01)
+    primary = ModelSpec("primary", "gemini", TIER_FAST, slow, expected_latency=0.02)
+    router = ModelRouter([primary, ModelSpec("secondary", "openai", TIER_FAST, fast, expected_latency=0.05)])
+
+    async def scenario():
+        result = await router.generate(TIER_FAST, "hi")
+        await asyncio.sleep(0.05) # 취소가 전파될 시간
+        return result
+
+    assert _run(scenario())[0] == "secondary"
+    assert slow.cancelled
+    # 취소된 요청은 지연 하한으로만 기록되고 오류로 세지 않음
+    assert len(primary.stats.latencies) == 1
+    assert list(primary.stats.outcomes) == []
+
+
+def test_no_hedge_when_primary_is_fast():
+    fast, backup = StubProvider(delay=0.01), StubProvider(delay=0.01)
+    router = ModelRouter([
+        ModelSpec("primary", "gemini", TIER_FAST, fast, expected_latency=0.5),
+        ModelSpec("secondary", "openai", TIER_FAST, backup, expected_latency=1.0),
+    ])
+    assert _run(router.generate(TIER_FAST, "hi"))[0] == "primary"
+    assert backup.calls == 0
+
+
+def test_error_falls_back_to_other_provider():
+    broken, healthy = StubProvider(fail=True), StubProvider(delay=0.01)
+    router = ModelRouter([
+        ModelSpec("gemini-model", "gemini", TIER_FAST, broken, expected_latency=0.1),
+        ModelSpec("openai-model", "openai", TIER_FAST, healthy, expected_latency=5.0),
+    ])
+    model_name, _ = _run(router.generate(TIER_FAST, "hi"))
+    assert model_name == "openai-model"
+    assert broken.calls == 1 and healthy.calls == 1
+
+
+def test_all_models_failing_raises_router_error():
+    router = ModelRouter([
+        ModelSpec("a", "gemini", TIER_FAST, StubProvider(fail=True)),
+        ModelSpec("b", "openai", TIER_FAST, StubProvider(fail=True)),
+    ])
+    with pytest.raises(ModelRouterError, match="All models failed"):
+        _run(router.generate(TIER_FAST, "hi"))
+
+
+def test_tier_filters_out_lower_quality_models():
+    router = ModelRouter([
+        ModelSpec("fast", "gemini", TIER_FAST, StubProvider(), expected_latency=0.1),
+        ModelSpec("high", "openai", TIER_HIGH, StubProvider(), expected_latency=5.0),
+    ])
+    assert [m.name for m in router.candidates(TIER_HIGH)] == ["high"]
+    assert _run(router.generate(TIER_HIGH, "report"))[0] == "high"
+
+
+def test_consecutive_failures_trigger_cooldown(monkeypatch):
+    monkeypatch.setattr(model_router, "FAILURE_COOLDOWN_SECONDS", 0.2)
+    broken = ModelSpec("flaky", "gemini", TIER_FAST, StubProvider(fail=True), expected_latency=0.1)
+    backup = ModelSpec("backup", "openai", TIER_FAST, StubProvider(delay=0.01), expected_latency=5.0)
+    router = ModelRouter([broken, backup])
+
+    for attempt in range(model_router.CONSECUTIVE_FAILURES_FOR_COOLDOWN):
+        assert router.candidates(TIER_FAST)[0].name == "flaky"
+        assert _run(router.generate(TIER_FAST, "hi"))[0] == "backup"
+
+    # N 번 연속 실패 -> cooldown 동안 비정상으로 취급되어 후순위로 밀림
+    assert not broken.stats.healthy
+    assert router.candidates(TIER_FAST)[0].name == "backup"
+
+    # cooldown 이 끝나면 다시 먼저 시도됨
+    time.sleep(0.25)
+    assert broken.stats.healthy
+    assert router.candidates(TIER_FAST)[0].name == "flaky"
+
+
+def test_success_resets_consecutive_failures():
+    stats = model_router.ModelStats()
+    for _ in range(model_router.CONSECUTIVE_FAILURES_FOR_COOLDOWN - 1):
+        stats.record(0.1, ok=False)
+    stats.record(0.1, ok=True)
+    stats.record(0.1, ok=False)
+    assert stats.consecutive_failures == 1
+    assert stats.cooldown_until == 0.0
@@ -0,0 +1,104 @@
+import shutil
+import datetime
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import main
+import mood_analytics
+from mood_analytics import compute_member_moods, score_conditions, needs_refresh, ROLLING_DAYS, TREND_DAYS
+from models import User, MemberMood
+
+N_DAYS = 30
+GOOD, BAD = "기분 좋음", "스트레스 때문에 우울함"
+
+
+def _columns(records):
+    """records: (user_id, day_offset, condition, blockers) tuples, already in time order."""
+    users, days, conditions, blockers = zip(*records)
+    return np.array(users), np.array(days), np.array(conditions, dtype=str), np.array(blockers, dtype=str)
+
+
+@pytest.fixture
+def result():
+    records = [(1, day, GOOD, "내용 없음") for day in range(N_DAYS - 1)]
+    records.append((1, N_DAYS - 1, BAD, "내용 없음"))
+    # 2번은 최근 4일만 기록, 점점 좋아짐 (마지막 날은 두 번 기록 -> 일 평균)
+    records += [(2, 26, "피곤", "내용 없음"), (2, 27, "무난", "내용 없음"), (2, 28, "괜찮", "내용 없음"),
+                (2, 29, "좋", "배포 권한 없음\n리뷰 지연"), (2, 29, "여유", "내용 없음")]
+    records.append((2, 20, "내용 없음", "오래된 블로커")) # ROLLING_DAYS 창 밖
+    records.sort(key=lambda r: r[1])
+    return compute_member_moods(*_columns(records), members=np.array([1, 2, 3]), n_days=N_DAYS)
+
+
+def test_rolling_mean(result):
+    good, bad = score_conditions(np.array([GOOD, BAD]))
+    assert result["rolling_score"][0] == pytest.approx(((ROLLING_DAYS - 1) * good + bad) / ROLLING_DAYS)
+
+    daily = score_conditions(np.array(["피곤", "무난", "괜찮", "좋", "여유"]))
+    expected = [daily[0], daily[1], daily[2], (daily[3] + daily[4]) / 2]
+    assert result["rolling_score"][1] == pytest.approx(np.mean(expected))
+    assert result["latest_score"][1] == pytest.approx(expected[-1])
+
+
+def test_z_score_anomaly_against_personal_baseline(result):
+    good, bad = score_conditions(np.array([GOOD, BAD]))
+    # 기준선이 일정하므로 sigma 는 SIGMA_FLOOR
+    assert result["z_score"][0] == pytest.approx((bad - good) / mood_analytics.SIGMA_FLOOR)
+    assert result["is_anomaly"][0]
+    # 기준선 표본이 MIN_BASELINE_SAMPLES 보다 적으면 판단하지 않음
+    assert np.isnan(result["z_score"][1])
+    assert not result["is_anomaly"][1]
+
+
+def test_trend_is_least_squares_slope(result):
+    daily = score_conditions(np.array(["피곤", "무난", "괜찮", "좋", "여유"]))
+    y = [daily[0], daily[1], daily[2], (daily[3] + daily[4]) / 2]
+    t = np.arange(TREND_DAYS - 4, TREND_DAYS)
+    assert result["trend"][1] == pytest.approx(np.polyfit(t, y, 1)[0])
+    assert result["trend"][1] > 0
+    assert result["trend"][0] < 0
+
+
+def test_blocker_count_and_members_without_records(result):
+    assert list(result["blocker_count"]) == [0, 2, 0]
+    assert list(result["last_offset"]) == [N_DAYS - 1, N_DAYS - 1, -1]
+    assert np.isnan(result["rolling_score"][2]) and np.isnan(result["trend"][2])
+
+
+def test_needs_refresh_when_rows_are_missing_or_old(monkeypatch):
+    monkeypatch.setattr(mood_analytics, "MOOD_STALE_HOURS", 6)
+    now = datetime.datetime.now()
+    fresh = MemberMood(user_id=1, updated_at=now - datetime.timedelta(hours=1))
+    old = MemberMood(user_id=2, updated_at=now - datetime.timedelta(hours=7))
+
+    assert not needs_refresh([fresh], member_count=1)
+    assert needs_refresh([fresh], member_count=2)
+    assert needs_refresh([fresh, old], member_count=2)
+
+
+def test_team_read_refreshes_stale_rows():
+    with TestClient(main.app) as client:
+        db = database.SessionLocal()
+        try:
+            team_user_ids = [u for (u,) in db.query(User.user_id).filter(User.team_id == 1)]
+            db.query(MemberMood).filter(MemberMood.user_id.in_(team_user_ids)).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        # 로그인/조회는 replica 에서 읽으므로 primary 를 복사 (복제 따라잡음)
+        shutil.copy(database.engine.url.database, database.replica_engine.url.database)
+
+        token = client.post("/api/v1/login", data={"username": "leader", "password": "password"}).json()["access_token"]
+        response = client.get("/api/v1/team/mood", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+
+    db = database.SessionLocal()
+    try:
+        moods = db.query(MemberMood).filter(MemberMood.team_id == 1).all()
+        assert len(moods) == len(team_user_ids)
+        assert not needs_refresh(moods, len(team_user_ids))
+    finally:
+        db.close()
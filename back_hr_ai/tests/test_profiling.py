@@ -0,0 +1,34 @@
+import asyncio
+import os
+import threading
+
+import profiling
+
+
+def test_streaming_export_is_not_profiled():
+    assert profiling.is_profiled_path("GET", "/api/v1/team/mood")
+    assert profiling.is_profiled_path("GET", "/api/v1/team/reports/3")
+    assert not profiling.is_profiled_path("GET", "/api/v1/team/reports/export")
+
+
+def test_profile_is_saved_off_the_event_loop(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    loop_thread, save_thread = [], []
+    original_save = profiling._save
+
+    def save(*args):
+        save_thread.append(threading.get_ident())
+        original_save(*args)
+
+    monkeypatch.setattr(profiling, "_save", save)
+
+    async def scenario():
+        loop_thread.append(threading.get_ident())
+        async with profiling.profile_request("GET", "/api/v1/team/mood", "header") as session:
+            profiling.record_span("llm", "stub", 0.0)
+        return session
+
+    session = asyncio.run(scenario())
+    assert save_thread and save_thread[0] != loop_thread[0]
+    assert os.path.exists(tmp_path / f"{session.profile_id}.json")
+    assert profiling.list_profiles()[0]["llm_count"] == 1
@@ -0,0 +1,119 @@
+import sys
+import shutil
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import main
+from models import Message
+
+
+def _replicate():
+    """Copy the primary SQLite file over the replica (stands in for replication catching up)."""
+    shutil.copy(database.engine.url.database, database.replica_engine.url.database)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def stub_llm(model_name, prompt, json_mode):
+        if json_mode:
+            return '[{"category": "오늘 한 일", "content": "API 문서 작성", "profanity_detected": false}]'
+        return "내일은 무엇을 하실 예정인가요?"
+
+    for spec in main.model_router.models:
+        monkeypatch.setattr(spec, "call", stub_llm)
+        monkeypatch.setattr(spec, "enabled", True)
+
+    database._recent_writes.clear()
+    with TestClient(main.app) as client:
+        _replicate()
+        yield client
+    database._recent_writes.clear()
+
+
+def _auth_headers(client, username="user"):
+    token = client.post("/api/v1/login", data={"username": username, "password": "password"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _room_message_count(session_factory, room_id):
+    db = session_factory()
+    try:
+        return db.query(Message).filter(Message.room_id == room_id).count()
+    finally:
+        db.close()
+
+
+def test_replica_engine_is_separate():
+    assert database.replica_engine is not database.engine
+    assert database.replica_engine.url.database != database.engine.url.database
+
+
+def test_read_after_intelligent_chat_goes_to_primary(client):
+    headers = _auth_headers(client)
+    room_id = client.get("/api/v1/chat_rooms", headers=headers).json()[0]["room_id"]
+    before = _room_message_count(database.ReadSessionLocal, room_id)
+
+    response = client.post(f"/api/v1/chat_rooms/{room_id}/messages", json={"prompt": "API 문서 작성했어"}, headers=headers)
+    assert response.status_code == 200
+
+    # replica 는 아직 새 메시지를 모름
+    assert _room_message_count(database.ReadSessionLocal, room_id) == before
+    assert _room_message_count(database.SessionLocal, room_id) == before + 2
+
+    # 쓰기 직후의 읽기는 primary 에서 와야 함
+    details = client.get(f"/api/v1/chat_rooms/{room_id}", headers=headers).json()
+    assert len(details["messages"]) == before + 2
+
+
+def test_read_without_recent_write_uses_replica(client):
+    headers = _auth_headers(client)
+    room_id = client.get("/api/v1/chat_rooms", headers=headers).json()[0]["room_id"]
+    before = _room_message_count(database.ReadSessionLocal, room_id)
+
+    client.post(f"/api/v1/chat_rooms/{room_id}/messages", json={"prompt": "API 문서 작성했어"}, headers=headers)
+    database._recent_writes.clear() # read-your-writes 창이 지난 상태
+
+    details = client.get(f"/api/v1/chat_rooms/{room_id}", headers=headers).json()
+    assert len(details["messages"]) == before
+
+
+def test_read_endpoint_authenticates_on_replica_only(client):
+    headers = _auth_headers(client)
+    primary_before = database.pool_wait_stats["primary"].count
+    replica_before = database.pool_wait_stats["replica"].count
+
+    assert client.get("/api/v1/reports", headers=headers).status_code == 200
+
+    assert database.pool_wait_stats["primary"].count == primary_before
+    assert database.pool_wait_stats["replica"].count == replica_before + 1
+
+
+def test_mark_recent_write_is_thread_safe(monkeypatch):
+    # 항목이 쌓여서 만료 정리 루프가 길어지고, 스레드 전환이 자주 일어나도록 설정
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 60.0)
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    database._recent_writes.clear()
+    errors = []
+
+    def writer(worker):
+        try:
+            for i in range(1000):
+                database.mark_recent_write(f"user:{worker}:{i}")
+                database.has_recent_write(f"user:{worker}:{i}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+        database._recent_writes.clear()
+    assert errors == []
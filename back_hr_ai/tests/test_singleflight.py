@@ -0,0 +1,157 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import main
+import singleflight
+from models import ReportContext
+from singleflight import run_idempotent, SingleFlight, IdempotencyCache, IdempotencyConflict
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(singleflight, "single_flight", SingleFlight())
+    monkeypatch.setattr(singleflight, "idempotency_cache", IdempotencyCache())
+    monkeypatch.setattr(singleflight, "_in_flight_fingerprints", {})
+
+
+class SlowCall:
+    def __init__(self, delay=0.05, result="done"):
+        self.delay = delay
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f"{self.result}:{self.calls}"
+
+
+def test_concurrent_calls_share_one_execution_whatever_the_key():
+    fn = SlowCall()
+
+    async def scenario():
+        return await asyncio.gather(
+            run_idempotent("report:1", fn, "k0"),
+            run_idempotent("report:1", fn, "k1"),
+            run_idempotent("report:1", fn),
+        )
+
+    assert asyncio.run(scenario()) == ["done:1"] * 3
+    assert fn.calls == 1
+
+
+def test_finished_result_is_replayed_for_the_same_key():
+    fn = SlowCall(delay=0)
+
+    async def scenario():
+        first = await run_idempotent("chat:1", fn, "k0", fingerprint="a")
+        replay = await run_idempotent("chat:1", fn, "k0", fingerprint="a")
+        fresh = await run_idempotent("chat:1", fn, "k1", fingerprint="a")
+        return first, replay, fresh
+
+    assert asyncio.run(scenario()) == ("done:1", "done:1", "done:2")
+    assert fn.calls == 2
+
+
+def test_reused_key_with_different_body_conflicts_after_finish():
+    fn = SlowCall(delay=0)
+
+    async def scenario():
+        await run_idempotent("chat:1", fn, "k0", fingerprint="a")
+        await run_idempotent("chat:1", fn, "k0", fingerprint="b")
+
+    with pytest.raises(IdempotencyConflict):
+        asyncio.run(scenario())
+    assert fn.calls == 1
+
+
+def test_reused_key_with_different_body_conflicts_while_in_flight():
+    fn = SlowCall()
+
+    async def scenario():
+        return await asyncio.gather(
+            run_idempotent("chat:1", fn, "k0", fingerprint="a"),
+            run_idempotent("chat:1", fn, "k0", fingerprint="b"),
+            return_exceptions=True,
+        )
+
+    first, second = asyncio.run(scenario())
+    assert first == "done:1"
+    assert isinstance(second, IdempotencyConflict)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    fn = SlowCall(delay=0.1)
+
+    async def scenario():
+        leader = asyncio.create_task(run_idempotent("report:1", fn))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(run_idempotent("report:1", fn))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return result
+
+    # follower 가 새 leader 가 되어 다시 실행
+    assert asyncio.run(scenario()) == "done:2"
+    assert fn.calls == 2
+
+
+def test_cancelled_follower_does_not_cancel_leader():
+    fn = SlowCall(delay=0.05)
+
+    async def scenario():
+        leader = asyncio.create_task(run_idempotent("report:1", fn))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(run_idempotent("report:1", fn))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(scenario()) == "done:1"
+
+
+def test_double_click_report_generates_once(monkeypatch):
+    llm_calls = []
+
+    async def stub_llm(model_name, prompt, json_mode):
+        llm_calls.append(model_name)
+        await asyncio.sleep(0.2)
+        return "## 오늘 한 일\n- API 문서 작성"
+
+    for spec in main.model_router.models:
+        monkeypatch.setattr(spec, "call", stub_llm)
+        monkeypatch.setattr(spec, "enabled", True)
+
+    with TestClient(main.app) as client:
+        token = client.post("/api/v1/login", data={"username": "user", "password": "password"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        room_id = client.post("/api/v1/chat_rooms", headers=headers).json()["room_id"]
+        db = database.SessionLocal()
+        try:
+            context = db.query(ReportContext).filter(ReportContext.room_id == room_id).one()
+            context.work_done = "API 문서 작성"
+            db.commit()
+        finally:
+            db.close()
+
+        statuses = []
+
+        def click(key):
+            response = client.post(f"/api/v1/chat_rooms/{room_id}/reports", headers={**headers, "Idempotency-Key": key})
+            statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=click, args=(f"k{i}",)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert statuses == [200, 200]
+    assert len(llm_calls) == 2 # 리포트 1번 + 제목 1번